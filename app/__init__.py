@@ -19,6 +19,12 @@ def create_app():
     app.register_blueprint(validation_bp)
     app.register_blueprint(admin_bp)
     
+    # Rebuild changed data in the background instead of inside requests
+    if Config.BACKGROUND_REFRESH:
+        from app.adapters.cache import DataCache
+        from app.services.refresh import DataRefresher
+        DataCache.refresher = DataRefresher()
+    
     return app
 
 # Create the app instance that Vercel will look for
@@ -1,120 +1,193 @@
-import json
 import os
-import pandas as pd
-from datetime import datetime, timedelta
-from app.services.data_loader import load_all_data
+import threading
+from app.config import Config
+from app.adapters.cache_backends import get_cache_backend
+from app.services.data_loader import check_sources, load_all_data
+
+# Data already loaded by this process, keyed by backend name.
+# Each entry is (snapshot token, data); the token changes
+# whenever any process rewrites or clears the snapshot.
+_process_cache = {}
+_process_cache_lock = threading.Lock()
 
 class DataCache:
-    def __init__(self, cache_file=None):
+    # Background DataRefresher installed by create_app (BACKGROUND_REFRESH);
+    # without one, stale data is rebuilt inside the request
+    refresher = None
+
+    def __init__(self, cache_dir=None, backend=None):
         # Use /tmp for Vercel (read-only filesystem elsewhere)
-        default_cache_path = '/tmp/cache.json' if os.environ.get("VERCEL") else './data/cache.json'
-        self.cache_file = cache_file or default_cache_path
-        self.cache_duration = timedelta(hours=1)  # Cache for 1 hour
+        default_cache_path = '/tmp/cache' if os.environ.get("VERCEL") else './data/cache'
+        self.cache_dir = cache_dir or default_cache_path
+        # Local snapshot directory, or Redis with a local mirror (CACHE_BACKEND)
+        self.backend = backend or get_cache_backend(self.cache_dir)
+
+    def _remember(self, token, data):
+        with _process_cache_lock:
+            _process_cache[self.backend.name] = (token, data)
+
+    def _forget(self):
+        with _process_cache_lock:
+            _process_cache.pop(self.backend.name, None)
 
-    def get_cached_datax(self):
+    def get_cached_data(self):
         """
-        Get cached data if it exists and is not expired.
+        Get cached data if it exists, whether or not its sources changed since.
+        Frames already loaded by this process are reused while the backend's
+        snapshot is unchanged, so most calls cost a single stat() (or GET).
         """
-        if not os.path.exists(self.cache_file):
+        token = self.backend.token()
+        if token is None:
+            self._forget()
             return None
 
-        try:
-            with open(self.cache_file, 'r') as f:
-                cache_data = json.load(f)
-
-            cache_time = datetime.fromisoformat(cache_data['timestamp'])
-            if datetime.now() - cache_time > self.cache_duration:
+        entry = _process_cache.get(self.backend.name)
+        if entry is not None and entry[0] == token:
+            data = entry[1]
+        else:
+            data = self.backend.load(mmap_mode=self._mmap_mode())
+            if data is None:
                 return None
+            self._remember(token, data)
 
-            # Convert cached data back to pandas DataFrames
-            data = cache_data['data']
-            data['kixie'] = pd.DataFrame(data['kixie']) if data.get('kixie') else pd.DataFrame()
-            data['powerlist'] = pd.DataFrame(data['powerlist']) if data.get('powerlist') else pd.DataFrame()
-            data['telesign'] = pd.DataFrame(data['telesign']) if data.get('telesign') else pd.DataFrame()
+        # Callers share the frames; only the dict itself is their own
+        return dict(data)
 
-            if data.get('last_updated'):
-                data['last_updated'] = datetime.fromisoformat(data['last_updated'])
+    def _mmap_mode(self):
+        return 'r' if Config.CACHE_MMAP else None
 
-            return data
-        except (json.JSONDecodeError, KeyError, ValueError, TypeError):
-            return None
-        
-    def get_cached_data(self):
+    def cache_data(self, data):
         """
-        Get cached data if it exists and is not expired.
+        Cache data as a new snapshot, published atomically, and return the copy
+        this process keeps. With CACHE_MMAP that is the mapped snapshot rather
+        than the freshly loaded frames, so the rebuilding worker shares pages too.
         """
-        if not os.path.exists(self.cache_file):
-            return None
-
-        try:
-            with open(self.cache_file, 'r') as f:
-                cache_data = json.load(f)
-
-            cache_time = datetime.fromisoformat(cache_data['timestamp'])
-            if datetime.now() - cache_time > self.cache_duration:
-                return None
+        token = self.backend.store(data)
+        if self._mmap_mode() is not None:
+            data = self.backend.load(mmap_mode=self._mmap_mode()) or data
+        self._remember(token, data)
+        return dict(data)
 
-            # Convert cached data back to pandas DataFrames
-            data = cache_data['data']
-            data['kixie'] = pd.DataFrame(data['kixie']) if data.get('kixie') else pd.DataFrame()
-            data['powerlist'] = pd.DataFrame(data['powerlist']) if data.get('powerlist') else pd.DataFrame()
-            data['telesign'] = pd.DataFrame(data['telesign']) if data.get('telesign') else pd.DataFrame()
+    def _check(self, cached_data, locked=False):
+        """
+        Return (fresh data or None, changed sources) for a cached copy.
+        `locked` says the caller already holds the rebuild lock.
+        """
+        if cached_data is None:
+            return None, None
 
-            # Restore datetime types where applicable
-            for key in ['kixie', 'telesign', 'powerlist']:
-                df = data.get(key)
-                if isinstance(df, pd.DataFrame) and not df.empty:
-                    for col in df.columns:
-                        if 'date' in col.lower() or 'time' in col.lower() or col.lower() == 'datetime':
-                            df[col] = pd.to_datetime(df[col], errors='coerce')
+        changed, current = check_sources(cached_data.get('sources'))
+        if changed:
+            return None, changed
 
-            # Restore last updated timestamp
-            if data.get('last_updated'):
-                data['last_updated'] = datetime.fromisoformat(data['last_updated'])
+        if current != cached_data.get('sources'):
+            # Touched but identical files: record new signatures once
+            cached_data['sources'] = current
+            self._record_sources(cached_data, locked)
+        return cached_data, changed
 
-            return data
+    def _record_sources(self, data, locked=False):
+        """
+        Keep newer signatures for the loaded snapshot in this process and, if
+        no rebuild is running, next to the snapshot; the frames are not rewritten.
+        """
+        with _process_cache_lock:
+            entry = _process_cache.get(self.backend.name)
+            if entry is not None and entry[1].get('version') == data.get('version'):
+                _process_cache[self.backend.name] = (entry[0], dict(entry[1], sources=data['sources']))
+
+        if locked:
+            self.backend.store_sources(data)
+            return
+        with self.backend.lock(timeout=0) as acquired:
+            if acquired:
+                self.backend.store_sources(data)
+
+    def _rebuild(self, force=False, prepare=None):
+        """
+        Reload changed sources, unless another process already did while we waited.
+        `prepare` runs on the new data before it is published.
+        """
+        cached_data = self.get_cached_data()
+        if force:
+            data = load_all_data()
+        else:
+            fresh, changed = self._check(cached_data, locked=True)
+            if fresh is not None:
+                return fresh
+            data = load_all_data(previous=cached_data, reload=changed)
+
+        if prepare is not None:
+            prepare(data)
+        return self.cache_data(data)
+
+    def refresh(self, force=False, prepare=None):
+        """
+        Bring the snapshot up to date (every source with force) while requests
+        keep using the current one; they switch when the new snapshot is published.
+        Returns None if another process held the rebuild lock past CACHE_LOCK_TIMEOUT.
+        """
+        if not force:
+            fresh, _ = self._check(self.get_cached_data())
+            if fresh is not None:
+                return fresh
 
-        except (json.JSONDecodeError, KeyError, ValueError, TypeError):
-            return None
+        with self.backend.lock(timeout=Config.CACHE_LOCK_TIMEOUT) as acquired:
+            if acquired:
+                return self._rebuild(force=force, prepare=prepare)
+        return None
 
-    def cache_data(self, data):
+    def request_refresh(self, force=False):
         """
-        Cache data with timestamp.
+        Refresh in the background when a refresher is installed; otherwise a
+        forced refresh clears the cache so the next request reloads.
         """
-        try:
-            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
-        except OSError:
-            # On Vercel, this might fail if not /tmp — safe to ignore
-            pass
+        if self.refresher is not None:
+            self.refresher.request(self.cache_dir, force=force)
+            return True
 
-        cache_data = {
-            'timestamp': datetime.now().isoformat(),
-            'data': {
-                'kixie': data['kixie'].to_dict('records') if not data['kixie'].empty else {},
-                'powerlist': data['powerlist'].to_dict('records') if not data['powerlist'].empty else {},
-                'telesign': data['telesign'].to_dict('records') if not data['telesign'].empty else {},
-                'last_updated': data.get('last_updated').isoformat() if data.get('last_updated') else None
-            }
-        }
-
-        with open(self.cache_file, 'w') as f:
-            json.dump(cache_data, f, default=str)
+        if force:
+            self.clear_cache()
+        return False
 
     def get_data(self):
         """
         Get data from cache or load fresh data.
+        The cache is valid until one of the Config.DATA_* files changes
+        (mtime/size, or content hash with CACHE_HASH_SOURCES or a Redis backend); then only the
+        changed sources are reloaded and the rest are taken from the cache.
+
+        Only one process rebuilds at a time. While it does, others serve
+        their last good copy, or wait for the rebuild if they have none.
+        With a background refresher, stale data is served while it rebuilds.
         """
         cached_data = self.get_cached_data()
+        fresh, _ = self._check(cached_data)
+        if fresh is not None:
+            return fresh
+
+        if cached_data is not None and self.refresher is not None:
+            self.refresher.request(self.cache_dir)
+            return cached_data
+
+        with self.backend.lock(timeout=0) as acquired:
+            if acquired:
+                return self._rebuild()
+
         if cached_data is not None:
+            # Stale but complete; the rebuilding process publishes the new snapshot
             return cached_data
 
-        data = load_all_data()
-        self.cache_data(data)
-        return data
+        with self.backend.lock(timeout=Config.CACHE_LOCK_TIMEOUT) as acquired:
+            if acquired:
+                return self._rebuild()
+
+        print("Warning: timed out waiting for the data cache rebuild, loading without the lock")
+        return self.cache_data(load_all_data())
 
     def clear_cache(self):
         """
         Clear the cache.
         """
-        if os.path.exists(self.cache_file):
-            os.remove(self.cache_file)
\ No newline at end of file
+        self._forget()
+        self.backend.clear()
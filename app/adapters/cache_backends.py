@@ -0,0 +1,403 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from app.config import Config
+from app.adapters.snapshot import (
+    POINTER_NAME, pack_snapshot, read_manifest, read_snapshot, read_sources, unpack_snapshot,
+    write_snapshot, write_sources
+)
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no flock; rebuilds are not coordinated there
+    fcntl = None
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+LOCK_POLL_SECONDS = 0.1
+
+# Release or extend a Redis lock only while it still holds our token, in one step
+_RELEASE_LOCK = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+_RENEW_LOCK = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+@contextmanager
+def _file_lock(path, timeout=None):
+    """
+    Hold an exclusive flock on `path` for the duration of the block.
+    Yields False without waiting when timeout is 0 and another process holds it,
+    or after `timeout` seconds otherwise; None waits indefinitely.
+    """
+    if fcntl is None:
+        yield True
+        return
+
+    with open(path, 'a') as f:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if deadline is not None and time.monotonic() >= deadline:
+                    yield False
+                    return
+                time.sleep(LOCK_POLL_SECONDS)
+        try:
+            yield True
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+def _load_local(directory, mmap_mode=None):
+    manifest = read_manifest(directory)
+    if manifest is None:
+        return None
+
+    try:
+        # Columnar snapshot keeps dtypes (categoricals, datetimes) as written
+        data = read_snapshot(directory, manifest, mmap_mode=mmap_mode)
+    except (OSError, KeyError, ValueError, TypeError):
+        return None
+
+    sources = read_sources(directory, manifest['snapshot'])
+    if sources is not None:
+        data['sources'] = sources
+    return data
+
+def _store_local_sources(directory, data):
+    """
+    Record data['sources'] next to the local snapshot it was loaded from.
+    """
+    manifest = read_manifest(directory)
+    if manifest is None or manifest['meta'].get('version') != data.get('version'):
+        return False
+    write_sources(directory, manifest['snapshot'], data['sources'])
+    return True
+
+class CacheBackend:
+    """
+    Storage for DataCache snapshots and, optionally, computed metric results.
+
+    token() must be cheap: DataCache calls it on every request and only
+    calls load() when the token differs from the copy it already holds.
+    """
+    def token(self):
+        raise NotImplementedError
+
+    def load(self, mmap_mode=None):
+        raise NotImplementedError
+
+    def store(self, data):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def store_sources(self, data):
+        """
+        Record newer source signatures for the current snapshot on this host,
+        without rewriting it. Returns whether they were recorded.
+        """
+        raise NotImplementedError
+
+    def lock(self, timeout=None):
+        """
+        Context manager serializing rebuilds; yields whether the lock was acquired.
+        """
+        raise NotImplementedError
+
+    def get_result(self, key):
+        return None
+
+    def set_result(self, key, value):
+        pass
+
+class FileBackend(CacheBackend):
+    """
+    Snapshot in a local directory, shared by the processes of one host.
+    """
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.name = os.path.abspath(cache_dir)
+        # Next to the cache directory so clear() never removes a held lock
+        self.lock_path = self.name + '.lock'
+
+    def token(self):
+        """
+        Identify the current snapshot by its pointer file's inode, mtime and size.
+        """
+        try:
+            stat = os.stat(os.path.join(self.cache_dir, POINTER_NAME))
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def load(self, mmap_mode=None):
+        return _load_local(self.cache_dir, mmap_mode)
+
+    def store(self, data):
+        try:
+            os.makedirs(os.path.dirname(self.name), exist_ok=True)
+        except OSError:
+            # On Vercel, this might fail if not /tmp — safe to ignore
+            pass
+
+        write_snapshot(self.cache_dir, data)
+        return self.token()
+
+    def clear(self):
+        if os.path.exists(self.cache_dir):
+            shutil.rmtree(self.cache_dir)
+
+    def store_sources(self, data):
+        return _store_local_sources(self.cache_dir, data)
+
+    def lock(self, timeout=None):
+        try:
+            os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+        except OSError:
+            pass
+        return _file_lock(self.lock_path, timeout)
+
+class RedisBackend(CacheBackend):
+    """
+    Snapshot and metric results in Redis, shared by every app container.
+
+    The packed columnar snapshot is stored in chunks under its name with a
+    TTL, and a 'current' key points at it. Each host unpacks the current snapshot into
+    a local mirror directory once, so its workers still memory-map it.
+    While Redis is unreachable the host keeps serving (and rebuilding) its
+    mirror, coordinated by a file lock next to it.
+    """
+    def __init__(self, client=None, url=None, prefix=None, mirror_dir=None, ttl=None, result_ttl=None):
+        self.client = client if client is not None else _redis_client(url or Config.REDIS_URL)
+        self.prefix = prefix if prefix is not None else Config.REDIS_PREFIX
+        self.mirror_dir = mirror_dir or './data/cache'
+        self.ttl = ttl if ttl is not None else Config.CACHE_REDIS_TTL
+        self.result_ttl = result_ttl if result_ttl is not None else Config.RESULT_CACHE_TTL
+        self.name = f"redis:{self.prefix}:{os.path.abspath(self.mirror_dir)}"
+
+    def _key(self, *parts):
+        return ':'.join((self.prefix,) + parts)
+
+    def _mirror_token(self):
+        manifest = read_manifest(self.mirror_dir)
+        return manifest['snapshot'] if manifest is not None else None
+
+    def token(self):
+        try:
+            name = self.client.get(self._key('snapshot', 'current'))
+        except _redis_errors() as e:
+            # Called on every request; once a minute is enough to notice the outage
+            _warn_every(self.name, f"Warning: Redis unavailable, serving the local snapshot: {e}")
+            return self._mirror_token()
+        return name.decode() if isinstance(name, bytes) else name
+
+    def _fetch(self, name, fileobj):
+        """
+        Copy the chunks of a published snapshot into fileobj; False if it is gone.
+        """
+        chunks = self.client.get(self._key('snapshot', name))
+        if chunks is None:
+            return False
+        for index in range(int(chunks)):
+            chunk = self.client.get(self._key('snapshot', name, str(index)))
+            if chunk is None:
+                return False
+            fileobj.write(chunk)
+        return True
+
+    def load(self, mmap_mode=None):
+        name = self.token()
+        if name is None:
+            return None
+
+        if self._mirror_token() != name:
+            # Spooled to disk chunk by chunk, so the packed snapshot is never in memory whole
+            os.makedirs(self.mirror_dir, exist_ok=True)
+            with tempfile.TemporaryFile(dir=self.mirror_dir) as packed:
+                try:
+                    if not self._fetch(name, packed):
+                        return None
+                except _redis_errors() as e:
+                    print(f"Warning: could not fetch snapshot from Redis: {e}")
+                    return None
+                packed.seek(0)
+                unpack_snapshot(self.mirror_dir, name, packed)
+
+        return _load_local(self.mirror_dir, mmap_mode)
+
+    def store(self, data):
+        name = write_snapshot(self.mirror_dir, data)
+
+        # Publish the chunks, then their count, before pointing 'current' at
+        # the snapshot; chunks keep each value well under Redis's 512MB limit
+        with tempfile.TemporaryFile(dir=self.mirror_dir) as packed:
+            pack_snapshot(self.mirror_dir, packed)
+            packed.seek(0)
+            try:
+                chunks = 0
+                for chunk in iter(lambda: packed.read(Config.CACHE_REDIS_CHUNK_BYTES), b''):
+                    self.client.set(self._key('snapshot', name, str(chunks)), chunk, ex=self.ttl)
+                    chunks += 1
+                self.client.set(self._key('snapshot', name), chunks, ex=self.ttl)
+                self.client.set(self._key('snapshot', 'current'), name, ex=self.ttl)
+            except _redis_errors() as e:
+                print(f"Warning: could not publish snapshot to Redis, keeping it local: {e}")
+        return name
+
+    def clear(self):
+        try:
+            self.client.delete(self._key('snapshot', 'current'))
+        except _redis_errors() as e:
+            print(f"Warning: could not clear snapshot in Redis: {e}")
+        if os.path.exists(self.mirror_dir):
+            shutil.rmtree(self.mirror_dir)
+
+    def store_sources(self, data):
+        # Signatures carry this host's paths and mtimes, so they stay next to its mirror
+        return _store_local_sources(self.mirror_dir, data)
+
+    def _acquire(self, key, owner, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        # Expires on its own if the holder dies mid-rebuild; renewed while held
+        lease_ms = int(Config.CACHE_LOCK_LEASE * 1000)
+        while not self.client.set(key, owner, nx=True, px=lease_ms):
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(LOCK_POLL_SECONDS)
+        return True
+
+    def _renew(self, key, owner, stop):
+        """
+        Extend the lock's lease until stop is set, so a rebuild longer than
+        CACHE_LOCK_LEASE keeps it.
+        """
+        lease_ms = int(Config.CACHE_LOCK_LEASE * 1000)
+        while not stop.wait(Config.CACHE_LOCK_LEASE / 3):
+            try:
+                if not self.client.eval(_RENEW_LOCK, 1, key, owner, lease_ms):
+                    print("Warning: the Redis rebuild lock expired while held; another rebuild may run concurrently")
+                    return
+            except _redis_errors() as e:
+                print(f"Warning: could not renew the Redis lock: {e}")
+
+    @contextmanager
+    def lock(self, timeout=None):
+        key = self._key('lock')
+        owner = uuid.uuid4().hex
+        try:
+            acquired = self._acquire(key, owner, timeout)
+        except _redis_errors() as e:
+            print(f"Warning: Redis unavailable, locking rebuilds on this host only: {e}")
+            acquired = None
+
+        if acquired is None:
+            with FileBackend(self.mirror_dir).lock(timeout) as acquired:
+                yield acquired
+            return
+        if not acquired:
+            yield False
+            return
+
+        stop = threading.Event()
+        renewer = threading.Thread(target=self._renew, args=(key, owner, stop), daemon=True)
+        renewer.start()
+        try:
+            yield True
+        finally:
+            stop.set()
+            renewer.join()
+            try:
+                self.client.eval(_RELEASE_LOCK, 1, key, owner)
+            except _redis_errors() as e:
+                print(f"Warning: could not release the Redis lock, it expires on its own: {e}")
+
+    def _result_key(self, key):
+        return self._key('result', hashlib.sha1(repr(key).encode()).hexdigest())
+
+    def get_result(self, key):
+        try:
+            payload = self.client.get(self._result_key(key))
+        except _redis_errors() as e:
+            print(f"Warning: could not read cached result from Redis: {e}")
+            return None
+        return json.loads(payload) if payload is not None else None
+
+    def set_result(self, key, value):
+        """
+        Share a result if it is small plain JSON that reads back equal;
+        frames and other rich results stay in the process that computed them.
+        """
+        try:
+            payload = json.dumps(value)
+        except (TypeError, ValueError):
+            return
+        if len(payload) > Config.RESULT_SHARED_MAX_BYTES or json.loads(payload) != value:
+            return
+        try:
+            self.client.set(self._result_key(key), payload, ex=self.result_ttl)
+        except _redis_errors() as e:
+            print(f"Warning: could not store result in Redis: {e}")
+
+_redis_clients = {}
+_redis_clients_lock = threading.Lock()
+
+def _redis_client(url):
+    """
+    One client (and connection pool) per URL for the whole process.
+    """
+    if redis is None:
+        raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package")
+    with _redis_clients_lock:
+        if url not in _redis_clients:
+            _redis_clients[url] = redis.Redis.from_url(url)
+        return _redis_clients[url]
+
+# Per-request warnings are printed at most once per interval
+WARNING_INTERVAL_SECONDS = 60
+_last_warnings = {}
+
+def _warn_every(key, message, interval=WARNING_INTERVAL_SECONDS):
+    now = time.monotonic()
+    last = _last_warnings.get(key)
+    if last is None or now - last >= interval:
+        _last_warnings[key] = now
+        print(message)
+
+def _redis_errors():
+    return (redis.exceptions.RedisError, OSError) if redis is not None else (OSError,)
+
+def get_cache_backend(cache_dir):
+    """
+    Backend selected by Config.CACHE_BACKEND ('file' or 'redis').
+    """
+    if Config.CACHE_BACKEND == 'redis':
+        return RedisBackend(mirror_dir=cache_dir)
+    return FileBackend(cache_dir)
+
+def get_result_backend():
+    """
+    Shared tier for memoized results, or None when results stay per process.
+    """
+    if Config.CACHE_BACKEND == 'redis':
+        return RedisBackend()
+    return None
@@ -0,0 +1,138 @@
+import functools
+import inspect
+import sys
+import threading
+from collections import OrderedDict
+from datetime import date
+import numpy as np
+import pandas as pd
+from app.config import Config
+from app.adapters.cache_backends import get_result_backend
+
+def _approx_bytes(value):
+    """
+    Rough in-memory size of a cached result: frames, series and arrays by
+    their buffers, containers by their items.
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_approx_bytes(key) + _approx_bytes(item) for key, item in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(_approx_bytes(item) for item in value)
+    return sys.getsizeof(value)
+
+class ResultCache:
+    """
+    Thread-safe LRU store for computed metric results, optionally backed by
+    a shared backend (Redis) so other processes and containers reuse them.
+    Bounded by entry count and by the approximate bytes the entries hold;
+    a result larger than the byte bound is returned but not kept.
+    """
+    def __init__(self, maxsize=None, backend=None, max_bytes=None):
+        self.maxsize = maxsize if maxsize is not None else Config.RESULT_CACHE_SIZE
+        self.max_bytes = max_bytes if max_bytes is not None else Config.RESULT_CACHE_MAX_BYTES
+        self.backend = backend
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    def _set_local(self, key, value):
+        size = _approx_bytes(value)
+        with self._lock:
+            if key in self._entries:
+                del self._entries[key]
+                self.nbytes -= self._sizes.pop(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = value
+            self._sizes[key] = size
+            self.nbytes += size
+            while len(self._entries) > self.maxsize or self.nbytes > self.max_bytes:
+                oldest, _ = self._entries.popitem(last=False)
+                self.nbytes -= self._sizes.pop(oldest)
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        if self.backend is not None:
+            value = self.backend.get_result(key)
+            if value is not None:
+                self._set_local(key, value)
+                return value
+        return default
+
+    def set(self, key, value):
+        self._set_local(key, value)
+        if self.backend is not None:
+            self.backend.set_result(key, value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.nbytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+# Shared by every service instance in this process
+result_cache = ResultCache(backend=get_result_backend())
+
+_MISSING = object()
+
+def _freeze(value):
+    """
+    Turn arguments and Config values into a hashable, order-independent key part.
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(_freeze(item) for item in value))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+def memoize(*config_attrs, daily=False):
+    """
+    Memoize a service method on (data version, method, arguments, Config values).
+
+    The instance must have a `data` dict; results are only cached when it
+    carries a 'version' (set by load_all_data). `config_attrs` names the
+    Config values the result depends on, and `daily` adds today's date for
+    results built from datetime.now(). Cached results are shared between
+    callers and must be treated as read-only.
+    """
+    def decorator(method):
+        signature = inspect.signature(method)
+        name = method.__qualname__
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            version = self.data.get('version') if isinstance(self.data, dict) else None
+            if version is None:
+                return method(self, *args, **kwargs)
+
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            arguments = _freeze({key: value for key, value in bound.arguments.items() if key != 'self'})
+            config = getattr(self, 'config', Config)
+            settings = tuple(_freeze(getattr(config, attr)) for attr in config_attrs)
+            key = (version, name, arguments, settings, date.today() if daily else None)
+
+            result = result_cache.get(key, _MISSING)
+            if result is _MISSING:
+                result = method(self, *args, **kwargs)
+                result_cache.set(key, result)
+            return result
+
+        return wrapper
+    return decorator
@@ -0,0 +1,406 @@
+import json
+import numbers
+import os
+import shutil
+import tarfile
+import time
+import uuid
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import pytz
+
+SNAPSHOT_FORMAT_VERSION = 2
+MANIFEST_NAME = 'manifest.json'
+# File naming the current snapshot subdirectory; replaced atomically on write
+POINTER_NAME = 'CURRENT'
+# Source signatures recorded after the snapshot was written (touched but identical files)
+SOURCES_NAME = 'SOURCES.json'
+SNAPSHOTS_KEPT = 2
+ABANDONED_SNAPSHOT_SECONDS = 3600
+
+def _save(directory, name, array):
+    np.save(os.path.join(directory, name), np.ascontiguousarray(array), allow_pickle=False)
+    return name + '.npy'
+
+def _load(directory, filename, mmap_mode=None):
+    return np.load(os.path.join(directory, filename), mmap_mode=mmap_mode, allow_pickle=False)
+
+def _write_strings(directory, name, strings):
+    """
+    Store a sequence of str as one UTF-8 buffer plus int64 end offsets.
+    """
+    encoded = [value.encode('utf-8', 'surrogatepass') for value in strings]
+    offsets = np.cumsum([len(value) for value in encoded], dtype=np.int64)
+    buffer = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    return {
+        'offsets': _save(directory, name + '.offsets', offsets),
+        'buffer': _save(directory, name + '.buffer', buffer),
+    }
+
+def _read_strings(directory, spec):
+    offsets = _load(directory, spec['offsets'])
+    text = _load(directory, spec['buffer']).tobytes()
+    starts = np.concatenate([[0], offsets[:-1]]) if len(offsets) else offsets
+    values = np.empty(len(offsets), dtype=object)
+    values[:] = [text[start:end].decode('utf-8', 'surrogatepass') for start, end in zip(starts.tolist(), offsets.tolist())]
+    return values
+
+# Type tags of the Python scalars a mixed object column is stored as, without pickling
+MIXED_NONE, MIXED_BOOL, MIXED_INT, MIXED_FLOAT, MIXED_STR = range(5)
+
+def _mixed_tag(value):
+    if value is None or value is pd.NA or value is pd.NaT:
+        return MIXED_NONE
+    if isinstance(value, (bool, np.bool_)):
+        return MIXED_BOOL
+    if isinstance(value, numbers.Integral):
+        return MIXED_INT
+    if isinstance(value, numbers.Real):
+        return MIXED_FLOAT
+    return MIXED_STR
+
+def _write_mixed(directory, name, series):
+    """
+    Store an object column of mixed scalars (e.g. True/False/None flags) as
+    per-row int8 type tags plus one array per type. Values that are not
+    None, bool, int, float or str are stored as their str().
+    """
+    values = series.tolist()
+    tags = np.array([_mixed_tag(value) for value in values], dtype=np.int8)
+    integers = [int(value) for value, tag in zip(values, tags) if tag in (MIXED_BOOL, MIXED_INT)]
+    floats = [float(value) for value, tag in zip(values, tags) if tag == MIXED_FLOAT]
+    strings = [value if isinstance(value, str) else str(value) for value, tag in zip(values, tags) if tag == MIXED_STR]
+    if any(not isinstance(value, str) for value, tag in zip(values, tags) if tag == MIXED_STR):
+        print(f"Warning: snapshot column {series.name!r} holds objects that are stored as strings")
+    return {
+        'kind': 'mixed',
+        'tags': _save(directory, name + '.tags', tags),
+        'integers': _save(directory, name + '.integers', np.array(integers, dtype=np.int64)),
+        'floats': _save(directory, name + '.floats', np.array(floats, dtype=np.float64)),
+        'strings': _write_strings(directory, name + '.strings', strings),
+    }
+
+def _read_mixed(directory, spec):
+    tags = _load(directory, spec['tags'])
+    values = np.empty(len(tags), dtype=object)
+    integers = _load(directory, spec['integers'])
+    numbered = (tags == MIXED_BOOL) | (tags == MIXED_INT)
+    bools = tags[numbered] == MIXED_BOOL
+    values[numbered] = [bool(value) if is_bool else value for value, is_bool in zip(integers.tolist(), bools.tolist())]
+    values[tags == MIXED_FLOAT] = _load(directory, spec['floats']).tolist()
+    values[tags == MIXED_STR] = _read_strings(directory, spec['strings'])
+    return values
+
+def _code_dtype(n_values):
+    """
+    Smallest signed integer dtype for dictionary codes, as pandas uses for
+    categorical codes, so mapped codes are not copied on read.
+    """
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_values < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+def _is_string_column(series):
+    return pd.api.types.infer_dtype(series, skipna=True) in ('string', 'empty')
+
+def _write_column(directory, name, series):
+    """
+    Write one column and return its manifest entry.
+    """
+    dtype = series.dtype
+
+    if isinstance(dtype, pd.CategoricalDtype):
+        categories = pd.Series(dtype.categories)
+        return {
+            'kind': 'category',
+            'codes': _save(directory, name + '.codes', series.cat.codes.values),
+            'categories': _write_column(directory, name + '.categories', categories),
+            'ordered': bool(dtype.ordered),
+        }
+
+    if isinstance(dtype, pd.DatetimeTZDtype):
+        return {
+            'kind': 'datetimetz',
+            'values': _save(directory, name, series.dt.tz_convert('UTC').dt.tz_localize(None).values),
+            'tz': str(dtype.tz),
+        }
+
+    if isinstance(series.array, pd.arrays.BooleanArray) or isinstance(series.array, (pd.arrays.IntegerArray, pd.arrays.FloatingArray)):
+        return {
+            'kind': 'masked',
+            'dtype': str(dtype),
+            'values': _save(directory, name, series.array._data),
+            'mask': _save(directory, name + '.mask', series.array._mask),
+        }
+
+    if dtype == object and _is_string_column(series):
+        # Dictionary-encode string columns: int32 codes into a UTF-8 buffer
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        missing = series[series.isna()]
+        return {
+            'kind': 'string',
+            'codes': _save(directory, name + '.codes', codes.astype(_code_dtype(len(uniques)))),
+            'uniques': _write_strings(directory, name + '.uniques', uniques),
+            'na': 'none' if missing.map(lambda value: value is None).all() else 'nan',
+        }
+
+    if dtype == object or not isinstance(dtype, np.dtype):
+        return _write_mixed(directory, name, series)
+
+    return {'kind': 'numpy', 'values': _save(directory, name, series.values)}
+
+def _read_column(directory, spec, mmap_mode=None):
+    """
+    Rebuild a column (numpy array or pandas extension array) from its manifest entry.
+    """
+    kind = spec['kind']
+
+    if kind == 'numpy':
+        return _load(directory, spec['values'], mmap_mode)
+
+    if kind == 'category':
+        categories = _read_column(directory, spec['categories'])
+        codes = _load(directory, spec['codes'], mmap_mode)
+        dtype = pd.CategoricalDtype(pd.Index(categories), ordered=spec['ordered'])
+        return pd.Categorical.from_codes(codes, dtype=dtype)
+
+    if kind == 'datetimetz':
+        values = _load(directory, spec['values'], mmap_mode)
+        # Integer nanoseconds are read as UTC without copying the (possibly mapped) buffer
+        return pd.DatetimeIndex(values.view('i8'), dtype=pd.DatetimeTZDtype(tz=spec['tz'])).array
+
+    if kind == 'masked':
+        dtype = pd.api.types.pandas_dtype(spec['dtype'])
+        array_type = dtype.construct_array_type()
+        return array_type(_load(directory, spec['values'], mmap_mode), _load(directory, spec['mask'], mmap_mode))
+
+    if kind == 'string':
+        uniques = _read_strings(directory, spec['uniques'])
+        if mmap_mode is not None:
+            # Stay dictionary-encoded so the per-row codes remain on the mapped
+            # pages; only the distinct strings are materialized in each process
+            codes = _load(directory, spec['codes'], mmap_mode)
+            return pd.Categorical.from_codes(codes, categories=pd.Index(uniques, dtype=object))
+        codes = _load(directory, spec['codes'])
+        na_value = None if spec['na'] == 'none' else np.nan
+        return np.append(uniques, na_value)[codes]
+
+    if kind == 'mixed':
+        return _read_mixed(directory, spec)
+
+    raise ValueError(f"Unknown column kind in snapshot: {kind}")
+
+def _encode_meta(value):
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat(), 'tz': value.tzinfo.zone if hasattr(value.tzinfo, 'zone') else None}
+    if isinstance(value, dict):
+        return {key: _encode_meta(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode_meta(item) for item in value]
+    return value
+
+def _decode_meta(value):
+    if isinstance(value, dict) and '__datetime__' in value:
+        decoded = datetime.fromisoformat(value['__datetime__'])
+        if value.get('tz'):
+            decoded = decoded.astimezone(pytz.timezone(value['tz']))
+        return decoded
+    if isinstance(value, dict):
+        return {key: _decode_meta(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_decode_meta(item) for item in value]
+    return value
+
+def _snapshot_dirs(directory):
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return []
+    return [name for name in names if os.path.isdir(os.path.join(directory, name))]
+
+def _prune_snapshots(directory, current, keep=SNAPSHOTS_KEPT):
+    """
+    Remove old snapshot directories, keeping the newest `keep` besides the current one.
+
+    A few previous snapshots are kept because readers in other processes may
+    still be opening files from the one they resolved just before the swap.
+    Directories without a manifest, and hidden staging directories, belong to
+    writers still in progress (or crashed ones) and are only removed once they are old.
+    """
+    complete = []
+    for name in _snapshot_dirs(directory):
+        path = os.path.join(directory, name)
+        if name == current:
+            continue
+        try:
+            if not name.startswith('.') and os.path.exists(os.path.join(path, MANIFEST_NAME)):
+                complete.append((os.path.getmtime(path), path))
+            elif time.time() - os.path.getmtime(path) > ABANDONED_SNAPSHOT_SECONDS:
+                shutil.rmtree(path, ignore_errors=True)
+        except OSError:
+            continue
+
+    complete.sort(reverse=True)
+    for _, path in complete[keep:]:
+        shutil.rmtree(path, ignore_errors=True)
+
+def write_snapshot(directory, data, timestamp=None):
+    """
+    Write a data dict to a snapshot directory.
+
+    Every DataFrame value is stored column by column as .npy files
+    (categoricals as codes + categories, strings dictionary-encoded, mixed
+    object columns as type tags + typed values; nothing is pickled), and
+    everything else goes into manifest.json. Each write goes to a new
+    subdirectory and is published by atomically replacing the CURRENT
+    pointer, so readers see either the previous snapshot or the new one,
+    never a partially written one.
+    """
+    timestamp = timestamp or datetime.now()
+    os.makedirs(directory, exist_ok=True)
+    name = f"{timestamp:%Y%m%dT%H%M%S}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    snapshot_dir = os.path.join(directory, name)
+    os.makedirs(snapshot_dir)
+
+    frames = {}
+    meta = {}
+    for key, value in data.items():
+        if isinstance(value, pd.DataFrame):
+            frame_dir = os.path.join(snapshot_dir, key)
+            os.makedirs(frame_dir)
+            frame = value.reset_index(drop=True)
+            frames[key] = {
+                'length': len(frame),
+                'columns': [
+                    {'name': col, **_write_column(frame_dir, str(position), frame[col])}
+                    for position, col in enumerate(frame.columns)
+                ],
+            }
+        else:
+            meta[key] = _encode_meta(value)
+
+    manifest = {
+        'format_version': SNAPSHOT_FORMAT_VERSION,
+        'snapshot': name,
+        'timestamp': timestamp.isoformat(),
+        'frames': frames,
+        'meta': meta,
+    }
+    with open(os.path.join(snapshot_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f)
+
+    _publish(directory, name)
+    return name
+
+def _publish(directory, name):
+    """
+    Point CURRENT at a complete snapshot subdirectory.
+    """
+    pointer_tmp = os.path.join(directory, f".{POINTER_NAME}.{name}")
+    with open(pointer_tmp, 'w') as f:
+        f.write(name)
+    os.replace(pointer_tmp, os.path.join(directory, POINTER_NAME))
+
+    _prune_snapshots(directory, name)
+
+def write_sources(directory, name, sources):
+    """
+    Record newer source signatures for snapshot `name` without rewriting it;
+    replaced atomically, and ignored once another snapshot is current.
+    """
+    sources_tmp = os.path.join(directory, f".{SOURCES_NAME}.{uuid.uuid4().hex[:8]}")
+    with open(sources_tmp, 'w') as f:
+        json.dump({'snapshot': name, 'sources': sources}, f)
+    os.replace(sources_tmp, os.path.join(directory, SOURCES_NAME))
+
+def read_sources(directory, name):
+    """
+    Return the signatures recorded by write_sources for snapshot `name`, or None.
+    """
+    try:
+        with open(os.path.join(directory, SOURCES_NAME), 'r') as f:
+            recorded = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return recorded['sources'] if recorded.get('snapshot') == name else None
+
+def pack_snapshot(directory, fileobj, manifest=None):
+    """
+    Write the current snapshot as a tar stream to fileobj, for storing
+    outside the filesystem. Returns its name, or None if there is none.
+    """
+    manifest = manifest or read_manifest(directory)
+    if manifest is None:
+        return None
+
+    with tarfile.open(fileobj=fileobj, mode='w') as tar:
+        tar.add(os.path.join(directory, manifest['snapshot']), arcname='.')
+    return manifest['snapshot']
+
+def unpack_snapshot(directory, name, fileobj):
+    """
+    Install a snapshot written by pack_snapshot under `directory` and make it current.
+    """
+    os.makedirs(directory, exist_ok=True)
+    staging_dir = os.path.join(directory, f".{name}.{uuid.uuid4().hex[:8]}")
+    with tarfile.open(fileobj=fileobj, mode='r') as tar:
+        tar.extractall(staging_dir, filter='data')
+
+    try:
+        os.rename(staging_dir, os.path.join(directory, name))
+    except OSError:
+        # Another process installed the same snapshot first
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+    _publish(directory, name)
+
+def read_manifest(directory):
+    """
+    Return the manifest of the current snapshot, or None if there is no complete snapshot.
+    """
+    try:
+        with open(os.path.join(directory, POINTER_NAME), 'r') as f:
+            name = f.read().strip()
+        with open(os.path.join(directory, name, MANIFEST_NAME), 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if manifest.get('format_version') != SNAPSHOT_FORMAT_VERSION:
+        return None
+    # Snapshots may come from other hosts (Redis); pickled columns are never loaded
+    if any(_has_pickled_column(column) for frame in manifest['frames'].values() for column in frame['columns']):
+        return None
+    return manifest
+
+def _has_pickled_column(spec):
+    if spec.get('kind') == 'object':
+        return True
+    return isinstance(spec.get('categories'), dict) and _has_pickled_column(spec['categories'])
+
+def read_snapshot(directory, manifest=None, mmap_mode=None):
+    """
+    Load a data dict written by write_snapshot, with dtypes preserved.
+
+    With mmap_mode='r', numeric, datetime, categorical and string columns are
+    read-only views of the mapped .npy files, so processes reading the same
+    snapshot share those pages. String columns then come back as categoricals.
+    """
+    manifest = manifest or read_manifest(directory)
+    if manifest is None:
+        return None
+
+    snapshot_dir = os.path.join(directory, manifest['snapshot'])
+    data = {key: _decode_meta(value) for key, value in manifest['meta'].items()}
+    for key, spec in manifest['frames'].items():
+        frame_dir = os.path.join(snapshot_dir, key)
+        columns = {
+            position: _read_column(frame_dir, column, mmap_mode)
+            for position, column in enumerate(spec['columns'])
+        }
+        frame = pd.DataFrame(columns, index=pd.RangeIndex(spec['length']), copy=False)
+        frame.columns = [column['name'] for column in spec['columns']]
+        data[key] = frame
+    return data
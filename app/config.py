@@ -13,6 +13,54 @@ class Config:
     DATA_TELESIGN_WITHOUT = os.environ.get('DATA_TELESIGN_WITHOUT', './data/telesign_without_live.csv')
     DATA_POWERLIST = os.environ.get('DATA_POWERLIST', './data/powerlist_contacts.csv')
     
+    # Rows per chunk when streaming the Kixie call history (0 reads the whole file at once)
+    KIXIE_CHUNKSIZE = int(os.environ.get('KIXIE_CHUNKSIZE', 100000))
+    
+    # Parse only rows appended to the Kixie export since the last load
+    KIXIE_INCREMENTAL = os.environ.get('KIXIE_INCREMENTAL', 'true').lower() == 'true'
+    
+    # Also compare SHA-1 of source files whose mtime/size changed before reloading them
+    # (always done with CACHE_BACKEND=redis, where each container has its own copies)
+    CACHE_HASH_SOURCES = os.environ.get('CACHE_HASH_SOURCES', 'false').lower() == 'true'
+    
+    # Seconds a worker without a cached copy waits for another worker's rebuild
+    CACHE_LOCK_TIMEOUT = int(os.environ.get('CACHE_LOCK_TIMEOUT', 300))
+    
+    # Memory-map cached snapshots read-only so all workers share one copy of the columns
+    CACHE_MMAP = os.environ.get('CACHE_MMAP', 'true').lower() == 'true'
+    
+    # Computed metric results kept per process (LRU, keyed by data version and parameters),
+    # bounded by entry count and by the approximate bytes held (frames count their columns)
+    RESULT_CACHE_SIZE = int(os.environ.get('RESULT_CACHE_SIZE', 256))
+    RESULT_CACHE_MAX_BYTES = int(os.environ.get('RESULT_CACHE_MAX_BYTES', 268435456))
+    
+    # Cache backend: 'file' (local snapshot directory) or 'redis' (shared by all containers)
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'file')
+    REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+    REDIS_PREFIX = os.environ.get('REDIS_PREFIX', 'kixie-dashboard')
+    # Seconds a Redis rebuild lock outlives a holder that stopped renewing it
+    CACHE_LOCK_LEASE = int(os.environ.get('CACHE_LOCK_LEASE', 30))
+    # Packed snapshots are stored in Redis in chunks of at most this many bytes
+    CACHE_REDIS_CHUNK_BYTES = int(os.environ.get('CACHE_REDIS_CHUNK_BYTES', 33554432))
+    # Seconds Redis keeps a snapshot and a computed result
+    CACHE_REDIS_TTL = int(os.environ.get('CACHE_REDIS_TTL', 86400))
+    RESULT_CACHE_TTL = int(os.environ.get('RESULT_CACHE_TTL', 3600))
+    # Largest JSON result shared through Redis; bigger ones stay per process
+    RESULT_SHARED_MAX_BYTES = int(os.environ.get('RESULT_SHARED_MAX_BYTES', 262144))
+    
+    # Rebuild data and warm metrics in a background thread, serving the previous data meanwhile
+    BACKGROUND_REFRESH = os.environ.get('BACKGROUND_REFRESH', 'false' if os.environ.get('VERCEL') else 'true').lower() == 'true'
+    # Seconds between background checks of the source files (0 checks only on requests)
+    REFRESH_POLL_SECONDS = int(os.environ.get('REFRESH_POLL_SECONDS', 60))
+    
+    # Parallel source loading: number of workers and 'thread' or 'process' executor
+    LOAD_WORKERS = int(os.environ.get('LOAD_WORKERS', 4))
+    LOAD_EXECUTOR = os.environ.get('LOAD_EXECUTOR', 'thread')
+    
+    # Cross-reference API page size: default and largest a client may request
+    CROSSREF_PAGE_SIZE = int(os.environ.get('CROSSREF_PAGE_SIZE', 100))
+    CROSSREF_MAX_PAGE_SIZE = int(os.environ.get('CROSSREF_MAX_PAGE_SIZE', 1000))
+    
     # Configuration parameters
     DEFAULT_DIAL_AT_A_TIME = int(os.environ.get('DEFAULT_DIAL_AT_A_TIME', 4))
     DEFAULT_MAX_ATTEMPTS = int(os.environ.get('DEFAULT_MAX_ATTEMPTS', 10))
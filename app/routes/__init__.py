@@ -1,2 +1,26 @@
 # Routes package
+import pandas as pd
+from flask import request
+from app.config import Config
 
+def date_arg(name, end_of_day=False):
+    """
+    Parse a date/datetime query argument; a bare end date includes that whole day.
+    Call times are naive local times, so an aware value (e.g. ...Z) is an
+    exact instant, converted to TIMEZONE and made naive.
+    """
+    value = request.args.get(name)
+    if not value:
+        return None
+    stamp = pd.Timestamp(value)
+    if stamp.tz is not None:
+        return stamp.tz_convert(Config.TIMEZONE).tz_localize(None)
+    if end_of_day and stamp == stamp.normalize():
+        stamp += pd.Timedelta(days=1)
+    return stamp
+
+def date_range_args():
+    """
+    (start, end) from the start/end query arguments; raises ValueError if either is not a date.
+    """
+    return date_arg('start'), date_arg('end', end_of_day=True)
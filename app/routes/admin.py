@@ -138,11 +138,12 @@ def upload_file():
             # Save the file
             file.save(filepath)
             
-            # Clear cache to force reload
+            # Reload in the background; pages keep showing the previous data until it is ready
             cache = DataCache()
-            cache.clear_cache()
-            
-            flash(f'File uploaded successfully: {filename}', 'success')
+            if cache.request_refresh(force=True):
+                flash(f'File uploaded successfully: {filename}. The dashboard will switch to the new data once it is loaded.', 'success')
+            else:
+                flash(f'File uploaded successfully: {filename}', 'success')
             
         except Exception as e:
             flash(f'Error processing CSV file: {str(e)}', 'error')
@@ -155,8 +156,10 @@ def upload_file():
 def refresh_data():
     """Refresh data from files."""
     cache = DataCache()
-    cache.clear_cache()
-    flash('Data refreshed successfully!', 'success')
+    if cache.request_refresh(force=True):
+        flash('Data refresh started. The dashboard will switch to the new data once it is loaded.', 'success')
+    else:
+        flash('Data refreshed successfully!', 'success')
     return redirect(url_for('admin.admin'))
 
 @admin_bp.route('/export/summary')
@@ -1,6 +1,8 @@
 from flask import Blueprint, render_template, request, jsonify
 import pandas as pd
+from app.config import Config
 from app.adapters.cache import DataCache
+from app.routes import date_range_args
 from app.services.metrics import MetricsCalculator
 from app.services.validation_merge import ValidationMerger
 from app.services.cooldown import CooldownManager
@@ -41,15 +43,20 @@ def index():
 
 @dashboard_bp.route('/api/baseline')
 def api_baseline():
-    """API endpoint for baseline metrics."""
+    """API endpoint for baseline metrics (?start=&end=)."""
     cache = DataCache()
     data = cache.get_data()
     
     if not data or not isinstance(data.get('kixie'), pd.DataFrame) or data['kixie'].empty:
         return jsonify({})
     
+    try:
+        start, end = date_range_args()
+    except ValueError:
+        return jsonify({'error': 'start and end must be dates like 2024-01-31'}), 400
+    
     metrics_calc = MetricsCalculator(data)
-    return jsonify(metrics_calc.calculate_baseline_metrics())
+    return jsonify(metrics_calc.calculate_baseline_metrics(start, end))
 
 @dashboard_bp.route('/api/pilot')
 def api_pilot():
@@ -67,3 +74,51 @@ def api_pilot():
     metrics_calc = MetricsCalculator(data)
     return jsonify(metrics_calc.calculate_pilot_metrics(dial_at_a_time, max_attempts))
 
+
+# Largest dial x attempts x per-day grid one sweep request may ask for
+MAX_SWEEP_CELLS = 10000
+
+def _range_arg(name, default):
+    """
+    Parse a positive integer range argument: '4', '2,4,6', '1-6' or '5-20:5' (inclusive, with step).
+    """
+    value = request.args.get(name)
+    if not value:
+        return [default]
+    try:
+        if '-' in value:
+            bounds, _, step = value.partition(':')
+            low, high = (int(part) for part in bounds.split('-', 1))
+            values = range(low, high + 1, int(step) if step else 1)
+        else:
+            values = [int(part) for part in value.split(',')]
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, a comma list or a range like 1-6:1")
+    if len(values) > MAX_SWEEP_CELLS:
+        raise ValueError(f"{name} has more than {MAX_SWEEP_CELLS} values")
+    if not values or min(values) < 1:
+        raise ValueError(f"{name} must contain positive integers")
+    return list(values)
+
+@dashboard_bp.route('/api/pilot/sweep')
+def api_pilot_sweep():
+    """API endpoint for pilot projections over a grid (?dial_at_a_time=1-6&max_attempts=5-15&attempts_per_day=1-3)."""
+    cache = DataCache()
+    data = cache.get_data()
+    
+    if not data or not isinstance(data.get('kixie'), pd.DataFrame) or data['kixie'].empty:
+        return jsonify({})
+    
+    config = Config()
+    try:
+        dial_at_a_time = _range_arg('dial_at_a_time', config.DEFAULT_DIAL_AT_A_TIME)
+        max_attempts = _range_arg('max_attempts', config.DEFAULT_MAX_ATTEMPTS)
+        attempts_per_day = _range_arg('attempts_per_day', config.DEFAULT_ATTEMPTS_PER_DAY)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if len(dial_at_a_time) * len(max_attempts) * len(attempts_per_day) > MAX_SWEEP_CELLS:
+        return jsonify({'error': f"sweep grid is limited to {MAX_SWEEP_CELLS} combinations"}), 400
+    
+    metrics_calc = MetricsCalculator(data)
+    return jsonify(metrics_calc.calculate_pilot_sweep(dial_at_a_time, max_attempts, attempts_per_day))
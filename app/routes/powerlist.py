@@ -28,7 +28,7 @@ def powerlist():
     cooldown_feed = cooldown_manager.get_cooldown_feed()
     
     # Get available list names
-    available_lists = data['powerlist']['List Name'].unique().tolist() if not data['powerlist'].empty else []
+    available_lists = metrics_calc.powerlist_index.names.tolist()
     
     return render_template('dashboard/powerlist.html',
                          attempt_distribution=attempt_distribution,
@@ -1,7 +1,8 @@
-from flask import Blueprint, render_template, jsonify
+from flask import Blueprint, render_template, jsonify, request
 import pandas as pd
 from app.adapters.cache import DataCache
-from app.services.metrics import MetricsCalculator
+from app.routes import date_range_args
+from app.services.metrics import MetricsCalculator, TREND_GRANULARITIES
 
 trends_bp = Blueprint('trends', __name__, url_prefix='/trends')
 
@@ -25,13 +26,22 @@ def trends():
 
 @trends_bp.route('/api/weekly')
 def api_weekly():
-    """API endpoint for weekly trends data."""
+    """API endpoint for trends data (?granularity=day|week|month&start=&end=)."""
     cache = DataCache()
     data = cache.get_data()
     
     if not data or not isinstance(data.get('kixie'), pd.DataFrame) or data['kixie'].empty:
         return jsonify({})
     
+    granularity = request.args.get('granularity', 'week')
+    if granularity not in TREND_GRANULARITIES:
+        return jsonify({'error': f"granularity must be one of: {', '.join(TREND_GRANULARITIES)}"}), 400
+    
+    try:
+        start, end = date_range_args()
+    except ValueError:
+        return jsonify({'error': 'start and end must be dates like 2024-01-31'}), 400
+    
     metrics_calc = MetricsCalculator(data)
-    return jsonify(metrics_calc.calculate_weekly_trends())
+    return jsonify(metrics_calc.calculate_weekly_trends(granularity, start, end))
 
@@ -1,7 +1,11 @@
-from flask import Blueprint, render_template, jsonify
+import base64
+import json
+from flask import Blueprint, Response, render_template, jsonify, request
 import pandas as pd
+from app.config import Config
 from app.adapters.cache import DataCache
-from app.services.validation_merge import ValidationMerger
+from app.routes import date_range_args
+from app.services.validation_merge import CROSSREF_CATEGORIES, ValidationMerger
 
 validation_bp = Blueprint('validation', __name__, url_prefix='/validation')
 
@@ -18,7 +22,8 @@ def validation():
                              last_updated=None)
     
     validation_merger = ValidationMerger(data)
-    cross_ref_data = validation_merger.cross_reference_data()
+    # The page shows the first rows of each category; the API pages through the rest
+    cross_ref_data = validation_merger.cross_reference_data(limit=10)
     hygiene_metrics = validation_merger.calculate_data_hygiene_metrics()
     
     return render_template('dashboard/validation.html',
@@ -26,17 +31,143 @@ def validation():
                          hygiene_metrics=hygiene_metrics,
                          last_updated=data['last_updated'])
 
+# Rows serialized per write when streaming the NDJSON export
+NDJSON_CHUNK_ROWS = 1000
+
+def _encode_cursor(state):
+    return base64.urlsafe_b64encode(json.dumps(state, separators=(',', ':')).encode()).decode().rstrip('=')
+
+def _decode_cursor(cursor):
+    """
+    Paging state of a cursor; raises ValueError unless every field has the
+    shape _crossref_args gives it (a cursor comes back from the client).
+    """
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if not isinstance(state, dict):
+            raise ValueError
+        offset, limit = state['offset'], state['limit']
+        if any(isinstance(value, bool) or not isinstance(value, int) for value in (offset, limit)) or offset < 0:
+            raise ValueError
+        if any(state.get(field) is not None and not isinstance(state[field], str) for field in ('category', 'sort', 'order', 'start', 'end')):
+            raise ValueError
+        _crossref_window(state)
+    except (ValueError, KeyError):
+        raise ValueError('cursor is not valid')
+    return state
+
+def _limit_arg():
+    value = request.args.get('limit')
+    if value is None:
+        return Config.CROSSREF_PAGE_SIZE
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError('limit must be a positive integer')
+
+def _crossref_args(version):
+    """
+    Paging state from a cursor, or from the category/sort/order/limit/start/end arguments.
+    Raises ValueError with a message for the client.
+    """
+    cursor = request.args.get('cursor')
+    if cursor:
+        state = _decode_cursor(cursor)
+        if state.get('version') != version:
+            raise ValueError('cursor belongs to data that has since been refreshed; start again from the first page')
+    else:
+        try:
+            start, end = date_range_args()
+        except ValueError:
+            raise ValueError('start and end must be dates like 2024-01-31')
+        state = {
+            'category': request.args.get('category'),
+            'sort': request.args.get('sort'),
+            'order': request.args.get('order', 'asc'),
+            'limit': _limit_arg(),
+            'start': start.isoformat() if start is not None else None,
+            'end': end.isoformat() if end is not None else None,
+            'offset': 0,
+            'version': version,
+        }
+    
+    categories = [state['category']] if state.get('category') else list(CROSSREF_CATEGORIES)
+    if any(category not in CROSSREF_CATEGORIES for category in categories):
+        raise ValueError(f"category must be one of: {', '.join(CROSSREF_CATEGORIES)}")
+    sortable = [column for column in CROSSREF_CATEGORIES[categories[0]] if all(column in CROSSREF_CATEGORIES[category] for category in categories)]
+    if state.get('sort') and state['sort'] not in sortable:
+        raise ValueError(f"sort must be one of: {', '.join(sortable)}")
+    if state.get('order') not in ('asc', 'desc'):
+        raise ValueError('order must be asc or desc')
+    if not isinstance(state.get('limit'), int) or state['limit'] < 1:
+        raise ValueError('limit must be a positive integer')
+    state['limit'] = min(state['limit'], Config.CROSSREF_MAX_PAGE_SIZE)
+    return state, categories
+
+def _crossref_window(state):
+    return tuple(pd.Timestamp(state[bound]) if state.get(bound) else None for bound in ('start', 'end'))
+
+def _crossref_rows(merger, category, state, offset=0, limit=None):
+    return merger.cross_reference_sorted(
+        category, state.get('sort'), state['order'] == 'asc', *_crossref_window(state), offset=offset, limit=limit
+    )
+
+def _crossref_page(merger, category, state):
+    count = len(merger.cross_reference_frames(*_crossref_window(state))[category])
+    offset, limit = state['offset'], state['limit']
+    next_offset = offset + limit
+    return {
+        'count': count,
+        'data': _crossref_rows(merger, category, state, offset, limit).to_dict('records'),
+        'next_cursor': _encode_cursor(dict(state, category=category, offset=next_offset)) if next_offset < count else None
+    }
+
+def _crossref_ndjson(merger, categories, state):
+    """
+    Every row of the categories as newline-delimited JSON, serialized a chunk at a time.
+    The rows are selected before streaming starts, so errors still produce an error response.
+    """
+    frames = [(category, _crossref_rows(merger, category, state)) for category in categories]
+    
+    def generate():
+        for category, rows in frames:
+            for offset in range(0, len(rows), NDJSON_CHUNK_ROWS):
+                chunk = rows.iloc[offset:offset + NDJSON_CHUNK_ROWS].assign(category=category)
+                yield chunk.to_json(orient='records', lines=True, date_format='iso').rstrip('\n') + '\n'
+    return generate()
+
 @validation_bp.route('/api/crossref')
 def api_crossref():
-    """API endpoint for cross-reference data."""
+    """
+    API endpoint for cross-reference data, one page per category
+    (?category=&sort=&order=asc|desc&limit=&start=&end=, then ?cursor=next_cursor).
+    format=ndjson streams every row instead.
+    """
     cache = DataCache()
     data = cache.get_data()
     
     if not data or not isinstance(data.get('telesign'), pd.DataFrame) or data['telesign'].empty:
         return jsonify({})
     
+    try:
+        state, categories = _crossref_args(data.get('version'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     validation_merger = ValidationMerger(data)
-    return jsonify(validation_merger.cross_reference_data())
+    if request.args.get('format') == 'ndjson':
+        return Response(
+            _crossref_ndjson(validation_merger, categories, state),
+            mimetype='application/x-ndjson',
+            headers={'Content-Disposition': 'attachment; filename=crossref.ndjson'}
+        )
+    
+    if state.get('category'):
+        return jsonify({'category': state['category'], **_crossref_page(validation_merger, state['category'], state)})
+    
+    results = {category: _crossref_page(validation_merger, category, state) for category in categories}
+    results['carrier_summary'] = validation_merger.cross_reference_frames(*_crossref_window(state))['carrier_summary']
+    return jsonify(results)
 
 @validation_bp.route('/api/hygiene')
 def api_hygiene():
@@ -50,3 +181,19 @@ def api_hygiene():
     validation_merger = ValidationMerger(data)
     return jsonify(validation_merger.calculate_data_hygiene_metrics())
 
+@validation_bp.route('/api/carriers')
+def api_carriers():
+    """API endpoint for call outcomes per carrier and risk level (?start=&end=)."""
+    cache = DataCache()
+    data = cache.get_data()
+    
+    if not data or not isinstance(data.get('telesign'), pd.DataFrame) or data['telesign'].empty:
+        return jsonify({})
+    
+    try:
+        start, end = date_range_args()
+    except ValueError:
+        return jsonify({'error': 'start and end must be dates like 2024-01-31'}), 400
+    
+    validation_merger = ValidationMerger(data)
+    return jsonify(validation_merger.calculate_carrier_outcomes(start, end))
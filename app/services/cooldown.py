@@ -1,6 +1,7 @@
 import pandas as pd
 from datetime import datetime, timedelta
 from app.config import Config
+from app.adapters.result_cache import memoize
 
 class CooldownManager:
     def __init__(self, data):
@@ -32,6 +33,7 @@ class CooldownManager:
         
         return cooldown_contacts
     
+    @memoize('DEFAULT_MAX_ATTEMPTS', 'COOLDOWN_DAYS', daily=True)
     def calculate_reattempt_potential(self):
         """
         Calculate potential for reattempt after cooldown period.
@@ -60,6 +62,7 @@ class CooldownManager:
             'cooldown_contacts': cooldown_contacts[['Phone Number', 'List Name', 'Attempt Count', 'cooldown_end', 'owner']].to_dict('records')
         }
     
+    @memoize('DEFAULT_MAX_ATTEMPTS', 'COOLDOWN_DAYS', daily=True)
     def get_cooldown_feed(self):
         """
         Get a feed of cooldown contacts with their status.
@@ -1,94 +1,286 @@
+import csv
+import hashlib
+import io
+import re
+import numpy as np
 import pandas as pd
 import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from datetime import datetime
 import pytz
+from pandas.api.types import union_categoricals
+from pandas.tseries.api import guess_datetime_format
 from app.config import Config
+from app.services.rollup import RunningAggregates
+from app.services.powerlist_index import PowerlistIndex
+from app.services.phone_index import PhoneIndex
+
+# Phone keys are the last (up to) 10 digits prefixed with a sentinel 1 so that
+# leading zeros survive the int conversion: '0987654321' -> 10987654321.
+PHONE_KEY_MISSING = -1
+PHONE_DIGITS = 10
+_NORMALIZE_BLOCK_ROWS = 65536
+
+# Read size when hashing an already-ingested Kixie prefix or scanning for its last line
+FINGERPRINT_BLOCK_BYTES = 65536
+_POWERS_OF_TEN = np.power(10, np.arange(19), dtype=np.int64)
+
+
+def _normalize_phone_scalar(phone):
+    """Per-value normalization, used for non-ASCII input."""
+    if pd.isna(phone):
+        return None
+    digits = ''.join(filter(str.isdecimal, str(phone).strip()))
+    return digits[-PHONE_DIGITS:] if len(digits) >= PHONE_DIGITS else digits
+
+
+def _phone_keys_from_bytes(values):
+    """
+    Compute phone keys for an array of ASCII strings.
+    Works on a (rows x width) uint8 matrix so no Python code runs per row.
+    """
+    raw = np.asarray(values, dtype='S')
+    width = raw.dtype.itemsize
+    if width == 0:
+        return np.full(len(raw), PHONE_KEY_MISSING, dtype=np.int64)
+    chars = raw.view(np.uint8).reshape(len(raw), width) - 48
+    is_digit = chars < 10
+    # Rank digits from the right; only the last PHONE_DIGITS carry weight
+    rank = np.cumsum(is_digit[:, ::-1], axis=1, dtype=np.int16)[:, ::-1]
+    weights = np.where(is_digit & (rank <= PHONE_DIGITS), _POWERS_OF_TEN[np.clip(rank - 1, 0, 18)], 0)
+    number = np.einsum('ij,ij->i', chars.astype(np.int64), weights)
+    n_digits = np.minimum(is_digit.sum(axis=1), PHONE_DIGITS)
+    keys = number + _POWERS_OF_TEN[n_digits]
+    keys[n_digits == 0] = PHONE_KEY_MISSING
+    return keys
+
+
+def _phone_keys_from_strings(values):
+    keys = np.empty(len(values), dtype=np.int64)
+    for start in range(0, len(values), _NORMALIZE_BLOCK_ROWS):
+        block = values[start:start + _NORMALIZE_BLOCK_ROWS]
+        try:
+            keys[start:start + len(block)] = _phone_keys_from_bytes(block)
+        except UnicodeEncodeError:
+            digits = [_normalize_phone_scalar(v) for v in block]
+            keys[start:start + len(block)] = [
+                int('1' + d) if d else PHONE_KEY_MISSING for d in digits
+            ]
+    return keys
+
+
+def _phone_keys_from_integers(values):
+    values = np.abs(values.astype(np.int64))
+    n_digits = np.minimum(
+        np.searchsorted(_POWERS_OF_TEN[1:], values, side='right') + 1,
+        PHONE_DIGITS,
+    )
+    return values % _POWERS_OF_TEN[PHONE_DIGITS] + _POWERS_OF_TEN[n_digits]
+
+
+def phone_keys_to_strings(keys):
+    """
+    Convert int64 phone keys back to their last-10-digit strings.
+    Missing keys become None.
+    """
+    keys = np.asarray(keys, dtype=np.int64)
+    width = PHONE_DIGITS + 1
+    # Format with the sentinel digit, then drop the first character of each row
+    text = keys.astype(f'U{width}')
+    chars = text.view('U1').reshape(len(keys), width)[:, 1:]
+    strings = np.ascontiguousarray(chars).view(f'U{PHONE_DIGITS}').ravel().astype(object)
+    strings[keys == PHONE_KEY_MISSING] = None
+    return strings
+
+
+def normalize_phones(series):
+    """
+    Vectorized phone normalization.
+    Returns (phone_normalized, phone_key): the last 10 digits as strings
+    (same values as normalize_phones_last10) and a compact int64 key for
+    joins, PHONE_KEY_MISSING where the value is missing or has no digits.
+    """
+    # Call histories repeat the same numbers, so only normalize distinct values
+    codes, uniques = pd.factorize(series)
+    unique_keys = np.full(len(uniques), PHONE_KEY_MISSING, dtype=np.int64)
+
+    if len(uniques):
+        values = np.asarray(uniques)
+        if pd.api.types.is_integer_dtype(uniques.dtype):
+            unique_keys[:] = _phone_keys_from_integers(values)
+        elif pd.api.types.is_float_dtype(uniques.dtype) and np.all(np.mod(values, 1) == 0):
+            # Phone columns with blanks are parsed as float64 by read_csv
+            unique_keys[:] = _phone_keys_from_integers(values)
+        else:
+            text = pd.Series(values, dtype=object).astype(str).values
+            unique_keys[:] = _phone_keys_from_strings(text)
+
+    unique_strings = phone_keys_to_strings(unique_keys)
+    # Values without any digits normalize to '' rather than None
+    unique_strings[unique_keys == PHONE_KEY_MISSING] = ''
+
+    # Missing values are coded -1; route them to an extra trailing slot
+    unique_keys = np.append(unique_keys, PHONE_KEY_MISSING)
+    unique_strings = np.append(unique_strings, None)
+    normalized = pd.Series(unique_strings[codes], index=series.index, dtype=object)
+    keys = pd.Series(unique_keys[codes], index=series.index, name='phone_key')
+    return normalized, keys
+
 
 def normalize_phones_last10(series):
     """
     Normalize phone numbers to last 10 digits for matching.
     Handles E.164 format (+1234567890) and local formats.
     """
-    def normalize_phone(phone):
-        if pd.isna(phone):
-            return None
-        phone_str = str(phone).strip()
-        # Remove all non-digit characters
-        digits = ''.join(filter(str.isdigit, phone_str))
-        # Return last 10 digits
-        return digits[-10:] if len(digits) >= 10 else digits
+    return normalize_phones(series)[0]
+
+
+KIXIE_LEGACY_COLUMNS = ['Date', 'Time', 'Agent First Name', 'Agent Last Name', 'Empty', 'Call Type', 'Status', 'Disposition']
+
+# Columns kept by the chunked reader; raw Date/Time/agent parts and the raw
+# To Number (already parsed into phone_normalized/phone_key) are dropped per chunk
+KIXIE_KEEP_COLUMNS = ['datetime', 'Disposition', 'Status', 'Source', 'Call Type', 'Duration',
+                      'phone_normalized', 'phone_key', 'agent_name']
+KIXIE_CATEGORY_COLUMNS = ['Disposition', 'Status', 'Source', 'Call Type', 'agent_name']
+KIXIE_NUMERIC_COLUMNS = ['Duration']
+
+# Low-cardinality strings stored as categoricals and counts downcast by the other loaders
+TELESIGN_CATEGORY_COLUMNS = ['carrier', 'risk_level', 'validation_type', 'source_file']
+POWERLIST_CATEGORY_COLUMNS = ['List Name', 'Status']
+POWERLIST_NUMERIC_COLUMNS = ['Connected', 'Attempt Count']
+
+# Kixie column dtypes; columns not listed here are left to read_csv
+KIXIE_DTYPES = {
+    'Date': 'str',
+    'Time': 'str',
+    'Agent First Name': 'str',
+    'Agent Last Name': 'str',
+    'To Number': 'str',
+    'Disposition': 'category',
+    'Status': 'category',
+    'Source': 'category',
+    'Call Type': 'category',
+}
+
+_LEGACY_DATE_PATTERN = re.compile(r'^\d{1,2}/\d{1,2}/\d{2,4}$')
+
+def _is_legacy_kixie(first_row):
+    """Old exports have no header row, so the first field is already a date like 7/1/2024."""
+    return len(first_row) == len(KIXIE_LEGACY_COLUMNS) and bool(_LEGACY_DATE_PATTERN.match(first_row[0].strip()))
+
+def _map_kixie_columns(columns):
+    """
+    Map flexible Kixie column names to standard names.
+    """
+    column_mapping = {}
+    for col in columns:
+        col_lower = col.lower().replace(' ', '_').replace('-', '_')
+        if col_lower in ['to_number', 'to', 'phone', 'phone_number', 'number']:
+            column_mapping[col] = 'To Number'
+        elif col_lower in ['disposition', 'outcome', 'call_outcome']:
+            column_mapping[col] = 'Disposition'
+        elif col_lower in ['date', 'call_date']:
+            column_mapping[col] = 'Date'
+        elif col_lower in ['time', 'call_time']:
+            column_mapping[col] = 'Time'
+        elif col_lower in ['agent_first_name', 'first_name', 'agent']:
+            column_mapping[col] = 'Agent First Name'
+        elif col_lower in ['agent_last_name', 'last_name']:
+            column_mapping[col] = 'Agent Last Name'
+        elif col_lower in ['status', 'call_status']:
+            column_mapping[col] = 'Status'
+        elif col_lower in ['duration', 'call_duration']:
+            column_mapping[col] = 'Duration'
+        elif col_lower in ['source', 'call_source']:
+            column_mapping[col] = 'Source'
+    return column_mapping
+
+DATE_FORMATS = ['%Y-%m-%d', '%m/%d/%Y', '%m/%d/%y', '%d/%m/%Y', '%Y/%m/%d', '%m-%d-%Y']
+TIME_FORMATS = ['%H:%M:%S', '%H:%M', '%I:%M:%S %p', '%I:%M %p', '%I:%M%p', '%H:%M:%S.%f']
+
+_CLOCK_TIME_PATTERN = re.compile(r'^\d{1,2}:\d{2}(:\d{2}(\.\d+)?)?$')
+
+def _guess_format(sample, candidates):
+    """Pick the first strptime format that parses the sample value."""
+    guessed = guess_datetime_format(sample)
+    if guessed:
+        return guessed
+    for fmt in candidates:
+        try:
+            datetime.strptime(sample, fmt)
+            return fmt
+        except ValueError:
+            continue
+    return None
+
+def _parse_unique_datetimes(values, candidates):
+    """
+    Parse distinct date or time strings with a format detected once.
+    Values the format does not fit are retried with mixed-format parsing.
+    """
+    values = pd.Series(values, dtype=object).astype(str)
+    if values.empty:
+        return pd.DatetimeIndex([], dtype='datetime64[ns]')
     
-    return series.apply(normalize_phone)
+    fmt = _guess_format(values.iloc[0].strip(), candidates)
+    parsed = pd.to_datetime(values, format=fmt or 'mixed', errors='coerce')
+    failed = parsed.isna()
+    if fmt and failed.any():
+        parsed[failed] = pd.to_datetime(values[failed], format='mixed', errors='coerce')
+    return pd.DatetimeIndex(parsed).astype('datetime64[ns]')
 
-def load_kixie(path):
+def _parse_unique_times(values):
     """
-    Load Kixie call history data.
-    Expected columns: Date, Time, Agent First Name, Agent Last Name, 
-    Status, Disposition, Duration, Source, To Number
+    Parse distinct time-of-day strings into timedeltas since midnight.
+    24-hour clock values use the vectorized timedelta parser; anything else
+    (AM/PM and so on) goes through datetime parsing.
     """
-    if not os.path.exists(path):
-        return pd.DataFrame()
+    values = pd.Series(values, dtype=object).astype(str)
+    clock = values.str.strip()
+    # Every value must be a 24-hour clock time; to_timedelta ignores an AM/PM suffix
+    if not values.empty and clock.str.fullmatch(_CLOCK_TIME_PATTERN).all():
+        # to_timedelta needs seconds, so pad HH:MM values
+        short = clock.str.count(':') == 1
+        offsets = pd.to_timedelta(clock.where(~short, clock + ':00'), errors='coerce')
+        if not offsets.isna().any():
+            return offsets.values.astype('timedelta64[ns]')
     
-    try:
-        # Read CSV with proper headers
-        df = pd.read_csv(path)
-        
-        # Check if file is empty
-        if df.empty:
-            print(f"Warning: {path} is empty. Returning empty DataFrame.")
-            return pd.DataFrame()
-        
-        # Check if this is the old format (no headers, data starts with date)
-        if len(df.columns) == 8 and str(df.columns[0]).startswith('7/'):  # Date-like first column
-            df = pd.read_csv(path, header=None)
-            df.columns = ['Date', 'Time', 'Agent First Name', 'Agent Last Name', 'Empty', 'Call Type', 'Status', 'Disposition']
-        else:
-            # This is the new format with proper headers - map to standard names
-            column_mapping = {}
-            for col in df.columns:
-                col_lower = col.lower().replace(' ', '_').replace('-', '_')
-                if col_lower in ['to_number', 'to', 'phone', 'phone_number', 'number']:
-                    column_mapping[col] = 'To Number'
-                elif col_lower in ['disposition', 'outcome', 'call_outcome']:
-                    column_mapping[col] = 'Disposition'
-                elif col_lower in ['date', 'call_date']:
-                    column_mapping[col] = 'Date'
-                elif col_lower in ['time', 'call_time']:
-                    column_mapping[col] = 'Time'
-                elif col_lower in ['agent_first_name', 'first_name', 'agent']:
-                    column_mapping[col] = 'Agent First Name'
-                elif col_lower in ['agent_last_name', 'last_name']:
-                    column_mapping[col] = 'Agent Last Name'
-                elif col_lower in ['status', 'call_status']:
-                    column_mapping[col] = 'Status'
-                elif col_lower in ['duration', 'call_duration']:
-                    column_mapping[col] = 'Duration'
-                elif col_lower in ['source', 'call_source']:
-                    column_mapping[col] = 'Source'
-            
-            # Rename columns to standard names
-            df = df.rename(columns=column_mapping)
-        
-        # Check if we have the essential columns after mapping
-        if 'Disposition' not in df.columns:
-            print(f"Warning: {path} does not have required 'Disposition' column. Available columns: {df.columns.tolist()}")
-            return pd.DataFrame()
-            
-    except Exception as e:
-        print(f"Error reading {path}: {str(e)}. Returning empty DataFrame.")
-        return pd.DataFrame()
+    parsed = _parse_unique_datetimes(values, TIME_FORMATS)
+    return (parsed - parsed.normalize()).values
+
+def build_timestamps(dates, times=None):
+    """
+    Build call timestamps from Date (and optional Time) columns.
+    Call histories repeat the same few thousand dates and times, so the
+    distinct values are parsed separately and combined with array arithmetic.
+    Rows with a missing or unparseable date or time become NaT.
+    """
+    date_codes, date_uniques = pd.factorize(dates)
+    date_values = _parse_unique_datetimes(date_uniques, DATE_FORMATS).values
+    stamps = np.append(date_values, np.datetime64('NaT', 'ns'))[date_codes]
     
+    if times is not None:
+        time_codes, time_uniques = pd.factorize(times)
+        offsets = _parse_unique_times(time_uniques)
+        stamps = stamps + np.append(offsets, np.timedelta64('NaT', 'ns'))[time_codes]
+    
+    return pd.Series(stamps, index=dates.index, name='datetime')
+
+def _add_kixie_derived_columns(df):
+    """
+    Add datetime, phone_normalized/phone_key and agent_name columns.
+    """
     # Parse datetime
     if 'Date' in df.columns and 'Time' in df.columns:
-        df['datetime'] = pd.to_datetime(df['Date'] + ' ' + df['Time'], errors='coerce')
+        df['datetime'] = build_timestamps(df['Date'], df['Time'])
     elif 'Date' in df.columns:
-        df['datetime'] = pd.to_datetime(df['Date'], errors='coerce')
+        df['datetime'] = build_timestamps(df['Date'])
     else:
         df['datetime'] = pd.NaT
     
     # Normalize phone numbers
     if 'To Number' in df.columns:
-        df['phone_normalized'] = normalize_phones_last10(df['To Number'])
+        df['phone_normalized'], df['phone_key'] = normalize_phones(df['To Number'])
     
     # Add agent full name
     if 'Agent First Name' in df.columns and 'Agent Last Name' in df.columns:
@@ -98,81 +290,395 @@ def load_kixie(path):
     
     return df
 
-def load_telesign(with_path, without_path):
+def compact_dtypes(df, categories=(), numeric=()):
     """
-    Load Telesign validation data from both files.
-    Expected columns: phone_e164, is_reachable, risk_level, carrier, validation_type
+    Make the given string columns categorical and downcast the given numeric
+    columns (whole-number floats become the smallest integer type that fits).
     """
-    dfs = []
-    
-    for path in [with_path, without_path]:
-        if os.path.exists(path):
-            try:
-                df = pd.read_csv(path)
-                
-                # Check if file is empty
-                if df.empty:
-                    print(f"Warning: {path} is empty. Skipping.")
-                    continue
-                
-                # Map flexible column names to standard names
-                column_mapping = {}
-                phone_column = None
-                
-                for col in df.columns:
-                    col_lower = col.lower().replace(' ', '_').replace('-', '_')
-                    if col_lower in ['phone_e164', 'contact_mobile_phone', 'phone', 'mobile_phone']:
-                        column_mapping[col] = 'phone_e164'
-                        phone_column = 'phone_e164'
-                    elif col_lower in ['is_reachable', 'reachable', 'live']:
-                        column_mapping[col] = 'is_reachable'
-                    elif col_lower in ['carrier', 'phone_carrier']:
-                        column_mapping[col] = 'carrier'
-                    elif col_lower in ['risk_level', 'risk']:
-                        column_mapping[col] = 'risk_level'
-                    elif col_lower in ['validation_type', 'validation']:
-                        column_mapping[col] = 'validation_type'
-                
-                # Rename columns to standard names
-                df = df.rename(columns=column_mapping)
-                
-                # Check if we have a phone column after mapping
-                if phone_column not in df.columns:
-                    print(f"Warning: {path} does not have required phone column. Available columns: {df.columns.tolist()}")
-                    continue
-                
-                
-                # Add default values for missing columns
-                if 'is_reachable' not in df.columns:
-                    # For files with "with_live" in name, assume all are reachable
-                    if 'with_live' in path.lower():  # Fix: Use more specific check
-                        df['is_reachable'] = True
-                    else:
-                        df['is_reachable'] = False
-                
-                # Add a source column to track which file the data came from
-                df['source_file'] = 'with_live' if 'with_live' in path.lower() else 'without_live'
-                
-                if 'carrier' not in df.columns:
-                    df['carrier'] = 'Unknown'
-                
-                if 'risk_level' not in df.columns:
-                    df['risk_level'] = 'Unknown'
-                
-                if 'validation_type' not in df.columns:
-                    df['validation_type'] = 'Unknown'
-                    
-                df['phone_normalized'] = normalize_phones_last10(df[phone_column])
-                dfs.append(df)
-                
-            except Exception as e:
-                print(f"Error reading {path}: {str(e)}. Skipping.")
-                continue
+    df = df.astype({
+        col: 'category' for col in categories
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype)
+    })
+    
+    downcast = {}
+    for col in numeric:
+        if col not in df.columns or not pd.api.types.is_numeric_dtype(df[col]) or pd.api.types.is_bool_dtype(df[col]):
+            continue
+        values = df[col]
+        if pd.api.types.is_float_dtype(values) and values.notna().all() and (values % 1 == 0).all():
+            values = values.astype(np.int64)
+        kind = 'integer' if pd.api.types.is_integer_dtype(values) else 'float'
+        downcast[col] = pd.to_numeric(values, downcast=kind)
+    return df.assign(**downcast) if downcast else df
+
+def _compact_kixie_chunk(df):
+    """
+    Keep only the columns the dashboard uses, with tight dtypes.
+    """
+    df = df[[col for col in KIXIE_KEEP_COLUMNS if col in df.columns]]
+    return compact_dtypes(df, KIXIE_CATEGORY_COLUMNS, KIXIE_NUMERIC_COLUMNS)
+
+def _concat_chunks(chunks, downcast=True):
+    """
+    Concatenate chunk frames, unifying categories so categorical columns stay categorical.
+    """
+    if len(chunks) == 1:
+        return chunks[0].reset_index(drop=True)
+    
+    categorical = [
+        col for col in chunks[0].columns
+        if all(col in chunk.columns and isinstance(chunk[col].dtype, pd.CategoricalDtype) for chunk in chunks)
+    ]
+    for col in categorical:
+        categories = union_categoricals([chunk[col] for chunk in chunks], sort_categories=True).categories
+        for chunk in chunks:
+            chunk[col] = chunk[col].cat.set_categories(categories)
+    
+    df = pd.concat(chunks, ignore_index=True)
+    if not downcast:
+        return df
+    
+    # Chunks that disagree on numeric width are upcast by concat
+    for col in df.columns:
+        if col not in categorical and pd.api.types.is_numeric_dtype(df[col]) and col != 'phone_key':
+            downcast_to = 'integer' if pd.api.types.is_integer_dtype(df[col]) else 'float'
+            df[col] = pd.to_numeric(df[col], downcast=downcast_to)
+    return df
+
+def sniff_kixie_format(path, sample_rows=5):
+    """
+    Inspect the first few lines of a Kixie export and pick the legacy or
+    modern schema. Returns the read_csv arguments (header, names, usecols,
+    dtype) for a single full parse, or None if the file has no rows at all.
+    """
+    with open(path, newline='', encoding='utf-8-sig', errors='replace') as f:
+        rows = [row for _, row in zip(range(sample_rows), csv.reader(f))]
+    
+    if not rows:
+        return None
+    
+    if _is_legacy_kixie(rows[0]):
+        names = KIXIE_LEGACY_COLUMNS
+        usecols = [name for name in names if name != 'Empty']
+        return {
+            'header': None,
+            'names': names,
+            'usecols': usecols,
+            'dtype': {name: KIXIE_DTYPES[name] for name in usecols if name in KIXIE_DTYPES},
+        }
+    
+    # Modern export: rename mapped columns, give the rest unique placeholders
+    # and only parse the first column mapped to each standard name
+    column_mapping = _map_kixie_columns(rows[0])
+    names = []
+    for position, col in enumerate(rows[0]):
+        name = column_mapping.get(col)
+        names.append(name if name and name not in names else f'_unused_{position}')
+    usecols = [name for name in names if not name.startswith('_unused_')]
+    return {
+        'header': 0,
+        'names': names,
+        'usecols': usecols,
+        'dtype': {name: KIXIE_DTYPES[name] for name in usecols if name in KIXIE_DTYPES},
+    }
+
+def _parse_kixie(source, read_args, chunksize=None):
+    """
+    Parse a Kixie CSV (path or binary file object) with sniffed read_csv
+    arguments and add the derived columns.
+    """
+    if chunksize:
+        with pd.read_csv(source, chunksize=chunksize, **read_args) as reader:
+            chunks = [_compact_kixie_chunk(_add_kixie_derived_columns(chunk)) for chunk in reader]
+        return _concat_chunks(chunks) if chunks else pd.DataFrame()
+    
+    df = pd.read_csv(source, **read_args)
+    if df.empty:
+        return df
+    return _add_kixie_derived_columns(df)
+
+def load_kixie(path, chunksize=None):
+    """
+    Load Kixie call history data.
+    Expected columns: Date, Time, Agent First Name, Agent Last Name, 
+    Status, Disposition, Duration, Source, To Number
+    
+    The format is sniffed from the first few lines and the file is parsed
+    once. With a chunksize the file is streamed in chunks and only the
+    columns in KIXIE_KEEP_COLUMNS are kept, with categorical/downcast dtypes.
+    """
+    return load_kixie_incremental(path, chunksize=chunksize)[0]
+
+class _PrefixReader(io.RawIOBase):
+    """Binary reader that stops at a fixed byte offset of the underlying file."""
+    
+    def __init__(self, f, limit):
+        self.f = f
+        self.remaining = limit
+    
+    def readable(self):
+        return True
+    
+    def readinto(self, buffer):
+        size = min(len(buffer), self.remaining)
+        data = self.f.read(size)
+        buffer[:len(data)] = data
+        self.remaining -= len(data)
+        return len(data)
+
+def _prefix_digest(path, offset):
+    """
+    sha1 of the first offset bytes of a file, left open so a caller can
+    extend it with bytes appended after offset.
+    """
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        remaining = offset
+        while remaining > 0:
+            block = f.read(min(remaining, FINGERPRINT_BLOCK_BYTES))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest
+
+def kixie_prefix_fingerprint(path, offset):
+    """
+    Fingerprint the first offset bytes of a file by hashing all of them, so
+    an edit anywhere in the ingested prefix forces a full reload.
+    """
+    return _prefix_digest(path, offset).hexdigest()
+
+def _complete_lines_end(f, start, end):
+    """Return the offset just past the last newline in f[start:end], or start."""
+    position = end
+    while position > start:
+        block_start = max(start, position - FINGERPRINT_BLOCK_BYTES)
+        f.seek(block_start)
+        newline = f.read(position - block_start).rfind(b'\n')
+        if newline >= 0:
+            return block_start + newline + 1
+        position = block_start
+    return start
+
+def _load_kixie_tail(path, previous, state, size, chunksize, digest):
+    """
+    Parse the complete lines appended since state['offset'] and append
+    them to the previously loaded frame. digest is the verified prefix
+    digest; the new fingerprint extends it with the tail rather than
+    hashing the prefix again.
+    """
+    with open(path, 'rb') as f:
+        end = _complete_lines_end(f, state['offset'], size)
+        f.seek(state['offset'])
+        tail = f.read(end - state['offset'])
+    
+    digest = digest.copy()
+    digest.update(tail)
+    new_state = dict(state, offset=end, fingerprint=digest.hexdigest(), appended_rows=0)
+    if not tail.strip():
+        return previous, new_state
+    
+    # The tail has no header row, whatever the file format
+    read_args = dict(state['read_args'], header=None)
+    new_rows = _parse_kixie(io.BytesIO(tail), read_args, chunksize)
+    if not chunksize:
+        new_rows = new_rows.reindex(columns=previous.columns)
+    new_state['appended_rows'] = len(new_rows)
+    return _concat_chunks([previous, new_rows], downcast=bool(chunksize)), new_state
+
+def load_kixie_incremental(path, previous=None, state=None, chunksize=None):
+    """
+    Load Kixie call history, reusing a previously loaded frame when the
+    file has only been appended to.
     
+    state records the byte offset parsed so far, a fingerprint of that
+    prefix and the sniffed read_csv arguments. If the prefix is unchanged
+    only the new tail is parsed and appended to previous (the last
+    state['appended_rows'] rows of df); otherwise the whole file is
+    reloaded. Only newline-terminated rows are parsed; an unterminated
+    last row is left for the load after its newline is written.
+    Returns (df, state).
+    """
+    if not os.path.exists(path):
+        return pd.DataFrame(), None
+    
+    try:
+        size = os.path.getsize(path)
+        if (state and previous is not None and not previous.empty
+                and state.get('chunksize') == chunksize
+                and size >= state['offset']):
+            digest = _prefix_digest(path, state['offset'])
+            if digest.hexdigest() == state['fingerprint']:
+                return _load_kixie_tail(path, previous, state, size, chunksize, digest)
+        
+        read_args = sniff_kixie_format(path)
+        
+        # Check if file is empty
+        if read_args is None:
+            print(f"Warning: {path} is empty. Returning empty DataFrame.")
+            return pd.DataFrame(), None
+        
+        # Check if we have the essential columns after mapping
+        if 'Disposition' not in read_args['usecols']:
+            print(f"Warning: {path} does not have required 'Disposition' column. Available columns: {read_args['names']}")
+            return pd.DataFrame(), None
+        
+        # Only parse the complete lines seen now, so a row still being
+        # written is picked up whole by the next incremental load
+        with open(path, 'rb') as f:
+            end = _complete_lines_end(f, 0, size)
+            f.seek(0)
+            df = _parse_kixie(_PrefixReader(f, end), read_args, chunksize)
+        
+        if df.empty:
+            print(f"Warning: {path} is empty. Returning empty DataFrame.")
+            return pd.DataFrame(), None
+            
+    except Exception as e:
+        print(f"Error reading {path}: {str(e)}. Returning empty DataFrame.")
+        return pd.DataFrame(), None
+    
+    state = {
+        'offset': end,
+        'fingerprint': kixie_prefix_fingerprint(path, end),
+        'read_args': read_args,
+        'chunksize': chunksize,
+    }
+    return df, state
+
+def _datetime_keys(stamps):
+    """
+    Zero-copy int64 view of a datetime column; NaT is the smallest value.
+    """
+    return stamps.array.asi8
+
+def sort_by_datetime(df):
+    """
+    Order calls by datetime (calls without one first, ties in file order),
+    so time windows can be taken with time_window.
+    """
+    if df.empty or 'datetime' not in df.columns:
+        return df
+    
+    keys = _datetime_keys(df['datetime'])
+    if len(keys) < 2 or (keys[1:] >= keys[:-1]).all():
+        return df
+    return df.take(np.argsort(keys, kind='stable')).reset_index(drop=True)
+
+def time_window(df, start=None, end=None):
+    """
+    Calls with start <= datetime < end, as a positional slice found by binary
+    search. The frame must be ordered by sort_by_datetime (load_all_data does).
+    With no bounds the whole frame is returned, calls without a datetime included.
+    """
+    if (start is None and end is None) or df.empty or 'datetime' not in df.columns:
+        return df
+    
+    stamps = df['datetime']
+    keys = _datetime_keys(stamps)
+    
+    def bound_key(bound):
+        bound = pd.Timestamp(bound)
+        tz = getattr(stamps.dtype, 'tz', None)
+        if tz is not None and bound.tz is None:
+            bound = bound.tz_localize(tz)
+        elif tz is None and bound.tz is not None:
+            bound = bound.tz_convert(None)
+        return bound.as_unit(stamps.array.unit).value
+    
+    # Calls without a datetime sort first and fall outside every window
+    low = np.searchsorted(keys, bound_key(start) if start is not None else np.iinfo(np.int64).min, side='right' if start is None else 'left')
+    high = np.searchsorted(keys, bound_key(end), side='left') if end is not None else len(keys)
+    return df.iloc[low:max(low, high)]
+
+def load_telesign_file(path):
+    """
+    Load a single Telesign validation file.
+    Returns None when the file is missing, empty or unusable.
+    """
+    if not os.path.exists(path):
+        return None
+    
+    try:
+        df = pd.read_csv(path)
+        
+        # Check if file is empty
+        if df.empty:
+            print(f"Warning: {path} is empty. Skipping.")
+            return None
+        
+        # Map flexible column names to standard names
+        column_mapping = {}
+        phone_column = None
+        
+        for col in df.columns:
+            col_lower = col.lower().replace(' ', '_').replace('-', '_')
+            if col_lower in ['phone_e164', 'contact_mobile_phone', 'phone', 'mobile_phone']:
+                column_mapping[col] = 'phone_e164'
+                phone_column = 'phone_e164'
+            elif col_lower in ['is_reachable', 'reachable', 'live']:
+                column_mapping[col] = 'is_reachable'
+            elif col_lower in ['carrier', 'phone_carrier']:
+                column_mapping[col] = 'carrier'
+            elif col_lower in ['risk_level', 'risk']:
+                column_mapping[col] = 'risk_level'
+            elif col_lower in ['validation_type', 'validation']:
+                column_mapping[col] = 'validation_type'
+        
+        # Rename columns to standard names
+        df = df.rename(columns=column_mapping)
+        
+        # Check if we have a phone column after mapping
+        if phone_column not in df.columns:
+            print(f"Warning: {path} does not have required phone column. Available columns: {df.columns.tolist()}")
+            return None
+        
+        
+        # Add default values for missing columns
+        if 'is_reachable' not in df.columns:
+            # For files with "with_live" in name, assume all are reachable
+            if 'with_live' in path.lower():  # Fix: Use more specific check
+                df['is_reachable'] = True
+            else:
+                df['is_reachable'] = False
+        
+        # Add a source column to track which file the data came from
+        df['source_file'] = 'with_live' if 'with_live' in path.lower() else 'without_live'
+        
+        if 'carrier' not in df.columns:
+            df['carrier'] = 'Unknown'
+        
+        if 'risk_level' not in df.columns:
+            df['risk_level'] = 'Unknown'
+        
+        if 'validation_type' not in df.columns:
+            df['validation_type'] = 'Unknown'
+            
+        df['phone_normalized'], df['phone_key'] = normalize_phones(df[phone_column])
+        return compact_dtypes(df, TELESIGN_CATEGORY_COLUMNS)
+        
+    except Exception as e:
+        print(f"Error reading {path}: {str(e)}. Skipping.")
+        return None
+
+def combine_telesign(frames):
+    """
+    Concatenate per-file Telesign frames, skipping files that failed to load.
+    """
+    dfs = [df for df in frames if df is not None]
     if dfs:
-        return pd.concat(dfs, ignore_index=True)
+        # Categoricals with different categories concatenate to object; re-compact
+        return compact_dtypes(pd.concat(dfs, ignore_index=True), TELESIGN_CATEGORY_COLUMNS)
     return pd.DataFrame()
 
+def load_telesign(with_path, without_path):
+    """
+    Load Telesign validation data from both files.
+    Expected columns: phone_e164, is_reachable, risk_level, carrier, validation_type
+    """
+    return combine_telesign([load_telesign_file(path) for path in [with_path, without_path]])
+
 def load_powerlist(path):
     """
     Load Powerlist contacts data.
@@ -220,7 +726,7 @@ def load_powerlist(path):
     
     # Normalize phone numbers
     if 'Phone Number' in df.columns:
-        df['phone_normalized'] = normalize_phones_last10(df['Phone Number'])
+        df['phone_normalized'], df['phone_key'] = normalize_phones(df['Phone Number'])
     
     # Ensure numeric columns
     if 'Connected' in df.columns:
@@ -228,20 +734,217 @@ def load_powerlist(path):
     if 'Attempt Count' in df.columns:
         df['Attempt Count'] = pd.to_numeric(df['Attempt Count'], errors='coerce').fillna(0)
     
-    return df
+    return compact_dtypes(df, POWERLIST_CATEGORY_COLUMNS, POWERLIST_NUMERIC_COLUMNS)
 
-def load_all_data():
+# Config attribute holding the path of each source file
+SOURCE_PATHS = {
+    'kixie': 'DATA_KIXIE',
+    'telesign_with': 'DATA_TELESIGN_WITH',
+    'telesign_without': 'DATA_TELESIGN_WITHOUT',
+    'powerlist': 'DATA_POWERLIST',
+}
+
+def _file_sha1(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def file_signature(path, hash_contents=False):
+    """
+    Describe a source file by path, mtime and size (plus a SHA-1 of its
+    contents when hash_contents is set). Returns None if it does not exist.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    
+    signature = {'path': path, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+    if hash_contents:
+        signature['sha1'] = _file_sha1(path)
+    return signature
+
+def check_sources(sources):
+    """
+    Compare recorded source signatures with the files on disk.
+    Returns (changed, current): the names of sources that need reloading
+    and up-to-date signatures. Contents are only hashed for files whose
+    path, mtime or size moved and whose recorded signature has a SHA-1, so
+    a touched but identical file (or another host's copy of it) is not
+    reloaded.
+    """
+    config = Config()
+    sources = sources or {}
+    changed = set()
+    current = {}
+    
+    for name, attr in SOURCE_PATHS.items():
+        recorded = sources.get(name)
+        signature = file_signature(getattr(config, attr))
+        current[name] = signature
+        
+        if recorded is None or signature is None:
+            if recorded != signature:
+                changed.add(name)
+            continue
+        
+        if (signature['path'], signature['mtime_ns'], signature['size']) == (recorded['path'], recorded['mtime_ns'], recorded['size']):
+            current[name] = recorded
+            continue
+        
+        if recorded.get('sha1'):
+            sha1 = _file_sha1(signature['path'])
+            if sha1 == recorded['sha1']:
+                current[name] = dict(signature, sha1=sha1, rows=recorded.get('rows'))
+                continue
+        
+        changed.add(name)
+    
+    return changed, current
+
+def _signature_identity(signature):
+    """
+    What identifies a source's contents: its SHA-1 when hashed, which is the
+    same on every host, otherwise path, mtime and size.
+    """
+    if signature is None:
+        return None
+    if signature.get('sha1'):
+        return signature['sha1']
+    return (signature['path'], signature['mtime_ns'], signature['size'])
+
+def dataset_version(sources):
+    """
+    Short identifier for a set of source signatures; changes whenever any input does.
+    """
+    parts = [(name, _signature_identity(signature)) for name, signature in sorted(sources.items())]
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:16]
+
+def _previous_source(previous, name):
+    """
+    Take a source's already-loaded result out of a previous load_all_data dict.
+    """
+    if name == 'kixie':
+        return previous.get('kixie', pd.DataFrame()), previous.get('kixie_ingest')
+    if name == 'powerlist':
+        return previous.get('powerlist', pd.DataFrame())
+    
+    # Telesign files are stored concatenated, with_live rows first
+    rows = {key: (previous['sources'].get(key) or {}).get('rows') or 0 for key in ['telesign_with', 'telesign_without']}
+    start = 0 if name == 'telesign_with' else rows['telesign_with']
+    if not rows[name]:
+        return None
+    return previous['telesign'].iloc[start:start + rows[name]]
+
+def _running_aggregates(previous, reuse, kixie, kixie_state, powerlist):
+    """
+    Bring the previous load's call aggregates up to date with the rows that
+    changed, or build them from all calls when the Kixie export was reloaded.
+    """
+    aggregates = RunningAggregates.from_data(previous) if previous else None
+    if aggregates is None or 'phone_key' not in kixie.columns:
+        return RunningAggregates.build(kixie, powerlist)
+    
+    if 'kixie' in reuse:
+        appended = 0
+    elif kixie_state is not None and kixie_state.get('appended_rows') is not None:
+        appended = kixie_state['appended_rows']
+    else:
+        return RunningAggregates.build(kixie, powerlist)
+    
+    if 'powerlist' not in reuse:
+        aggregates.reattribute(previous['kixie'], previous.get('powerlist'), powerlist)
+    return aggregates.add(kixie.iloc[len(kixie) - appended:] if appended else None, powerlist)
+
+def load_all_data(max_workers=None, previous=None, reload=None):
     """
     Load all data sources and return as a dictionary.
+    The four CSV files are parsed concurrently by up to max_workers workers
+    (Config.LOAD_WORKERS by default); 1 loads them one after the other.
+    
+    previous is an earlier result of load_all_data. When reload names a
+    subset of SOURCE_PATHS, the other sources are taken from previous
+    instead of being parsed again; when incremental Kixie ingest is enabled
+    only the rows appended to the Kixie export are parsed.
     """
     config = Config()
+    max_workers = config.LOAD_WORKERS if max_workers is None else max_workers
+    
+    # Record signatures before reading so changes made mid-load trigger another reload.
+    # A Redis snapshot is checked by containers with their own copies of the
+    # files, so its signatures always carry a content hash
+    hash_contents = config.CACHE_HASH_SOURCES or config.CACHE_BACKEND == 'redis'
+    sources = {
+        name: file_signature(getattr(config, attr), hash_contents)
+        for name, attr in SOURCE_PATHS.items()
+    }
+    
+    reuse = set()
+    if previous and reload is not None and previous.get('sources'):
+        reuse = set(SOURCE_PATHS) - set(reload)
+    
+    kixie_previous, kixie_state = None, None
+    if previous and config.KIXIE_INCREMENTAL:
+        kixie_previous, kixie_state = previous.get('kixie'), previous.get('kixie_ingest')
+    
+    tasks = {
+        'kixie': (load_kixie_incremental, (config.DATA_KIXIE, kixie_previous, kixie_state, config.KIXIE_CHUNKSIZE)),
+        'telesign_with': (load_telesign_file, (config.DATA_TELESIGN_WITH,)),
+        'telesign_without': (load_telesign_file, (config.DATA_TELESIGN_WITHOUT,)),
+        'powerlist': (load_powerlist, (config.DATA_POWERLIST,)),
+    }
+    tasks = {name: task for name, task in tasks.items() if name not in reuse}
+    
+    # A worker process would be sent a pickled copy of the previous Kixie
+    # frame, so an incremental Kixie load runs here while the pool parses
+    # the other files
+    local = {}
+    if config.LOAD_EXECUTOR == 'process' and kixie_previous is not None and 'kixie' in tasks:
+        local['kixie'] = tasks.pop('kixie')
+    
+    if max_workers > 1 and len(tasks) > 1:
+        executor_class = ProcessPoolExecutor if config.LOAD_EXECUTOR == 'process' else ThreadPoolExecutor
+        with executor_class(max_workers=min(max_workers, len(tasks))) as executor:
+            futures = {name: executor.submit(func, *args) for name, (func, args) in tasks.items()}
+            results = {name: func(*args) for name, (func, args) in local.items()}
+            results.update({name: future.result() for name, future in futures.items()})
+    else:
+        results = {name: func(*args) for name, (func, args) in {**local, **tasks}.items()}
+    
+    results.update({name: _previous_source(previous, name) for name in reuse})
+    kixie, kixie_state = results['kixie']
+    aggregates = _running_aggregates(previous, reuse, kixie, kixie_state, results['powerlist'])
+    kixie = sort_by_datetime(kixie)
+    
+    if {'telesign_with', 'telesign_without'} <= reuse:
+        telesign = previous['telesign']
+    else:
+        telesign = combine_telesign([results['telesign_with'], results['telesign_without']])
+    
+    for name in ['telesign_with', 'telesign_without']:
+        if sources[name] is not None:
+            sources[name]['rows'] = len(results[name]) if results[name] is not None else 0
     
     data = {
-        'kixie': load_kixie(config.DATA_KIXIE),
-        'telesign': load_telesign(config.DATA_TELESIGN_WITH, config.DATA_TELESIGN_WITHOUT),
-        'powerlist': load_powerlist(config.DATA_POWERLIST),
+        'kixie': kixie,
+        'telesign': telesign,
+        'powerlist': results['powerlist'],
+        # Pre-aggregated call counts the dashboard KPIs are answered from
+        **aggregates.frames(),
+        # Distinct list names, their rows and attempt histograms
+        **PowerlistIndex.build(results['powerlist']).frames(),
+        # Sorted phone keys and row counts per source, for overlap counts without merges
+        **PhoneIndex.build({
+            name: frame['phone_key'].values
+            for name, frame in [('kixie', kixie), ('telesign', telesign), ('powerlist', results['powerlist'])]
+            if 'phone_key' in frame.columns
+        }).frames(),
+        'kixie_ingest': kixie_state,
+        'sources': sources,
+        'version': dataset_version(sources),
         'last_updated': datetime.now(pytz.timezone(config.TIMEZONE))
     }
     
     return data
-
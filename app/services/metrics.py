@@ -1,7 +1,28 @@
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 import pytz
 from app.config import Config
+from app.adapters.result_cache import memoize
+from app.services.rollup import build_call_cube, build_phone_dispositions
+from app.services.powerlist_index import PowerlistIndex
+from app.services.data_loader import time_window
+
+# Trend granularities and the pandas period frequency used for their labels
+TREND_GRANULARITIES = {'day': 'D', 'week': 'W', 'month': 'M'}
+
+def _period_buckets(stamps, granularity):
+    """
+    Start date of each timestamp's day, week (Monday-based, like Period 'W') or month.
+    """
+    if granularity == 'month':
+        return stamps.astype('datetime64[M]').astype('datetime64[D]')
+    days = stamps.astype('datetime64[D]')
+    if granularity == 'week':
+        # 1970-01-01 was a Thursday; shift so weeks start on Monday
+        day_numbers = days.astype(np.int64)
+        return (day_numbers - (day_numbers + 3) % 7).astype('datetime64[D]')
+    return days
 
 class MetricsCalculator:
     def __init__(self, data):
@@ -10,19 +31,27 @@ class MetricsCalculator:
         self.kixie_df = data.get('kixie', pd.DataFrame())
         self.powerlist_df = data.get('powerlist', pd.DataFrame())
         self.telesign_df = data.get('telesign', pd.DataFrame())
+        self._powerlist_index = None
+    
+    @property
+    def powerlist_index(self):
+        if self._powerlist_index is None:
+            self._powerlist_index = PowerlistIndex.from_data(self.data)
+        return self._powerlist_index
     
-    def calculate_baseline_metrics(self):
+    @memoize('CONNECT_DISPOSITIONS', 'DEFAULT_DIAL_AT_A_TIME', 'DEFAULT_MAX_ATTEMPTS')
+    def calculate_baseline_metrics(self, start=None, end=None):
         """
-        Calculate baseline metrics before any changes.
+        Calculate baseline metrics before any changes, optionally limited to
+        calls with start <= datetime < end.
         """
         if self.kixie_df.empty:
             return {}
         
         # Connect Rate = connected_calls / total_calls
-        total_calls = len(self.kixie_df)
-        connected_calls = len(self.kixie_df[
-            self.kixie_df['Disposition'].isin(self.config.CONNECT_DISPOSITIONS)
-        ])
+        cube = self._call_cube(start, end)
+        total_calls = int(cube['calls'].sum())
+        connected_calls = int(cube.loc[cube['Disposition'].isin(self.config.CONNECT_DISPOSITIONS), 'calls'].sum())
         connect_rate = (connected_calls / total_calls * 100) if total_calls > 0 else 0
         
         # Answer Event % approximation
@@ -33,11 +62,10 @@ class MetricsCalculator:
         answer_event_pct = (calls_logged_in_history / (calls_logged_in_history + lost_race_attempts) * 100) if (calls_logged_in_history + lost_race_attempts) > 0 else 0
         
         # Avg Attempts per Lost-Race Number
-        lost_race_df = self.kixie_df[
-            ~self.kixie_df['Disposition'].isin(self.config.CONNECT_DISPOSITIONS)
-        ]
-        if 'phone_normalized' in lost_race_df.columns and not lost_race_df.empty:
-            avg_attempts_lost_race = lost_race_df.groupby('phone_normalized').size().mean()
+        phone_dispositions = self._phone_dispositions(start, end)
+        lost_race = phone_dispositions[~phone_dispositions['Disposition'].isin(self.config.CONNECT_DISPOSITIONS)]
+        if not lost_race.empty:
+            avg_attempts_lost_race = lost_race['calls'].sum() / lost_race['phone_key'].nunique()
         else:
             avg_attempts_lost_race = 0
         
@@ -60,6 +88,8 @@ class MetricsCalculator:
             'connected_calls': connected_calls
         }
     
+    @memoize('CONNECT_DISPOSITIONS', 'DEFAULT_DIAL_AT_A_TIME', 'DEFAULT_MAX_ATTEMPTS', 'PILOT_LIST_NAME',
+             'TARGET_CONNECT_UPLIFT_PCT', 'SUCCESS_CRITERIA_CONNECT_UPLIFT_PCT', 'SUCCESS_CRITERIA_VOICEMAIL_UPLIFT_PCT')
     def calculate_pilot_metrics(self, dial_at_a_time_override=None, max_attempts_override=None):
         """
         Calculate pilot metrics for NAICS Powerlist with potential overrides.
@@ -67,22 +97,17 @@ class MetricsCalculator:
         if self.powerlist_df.empty:
             return {}
         
-        # Filter for pilot list - if no NAICS contacts, use a sample of all contacts
-        pilot_df = self.powerlist_df[
-            self.powerlist_df['List Name'].str.contains(self.config.PILOT_LIST_NAME, case=False, na=False)
-        ]
+        # Pilot list contacts - if no NAICS contacts, use a sample of all contacts
+        index = self.powerlist_index
+        sample_size = index.size(index.match(self.config.PILOT_LIST_NAME))
         
-        # If no NAICS contacts found, use a sample of all contacts for pilot
-        if pilot_df.empty:
-            # Take a sample of contacts for pilot testing
+        # If no NAICS contacts found, take a sample of contacts for pilot testing
+        if sample_size == 0:
             sample_size = min(100, len(self.powerlist_df))  # Sample up to 100 contacts
-            pilot_df = self.powerlist_df.sample(n=sample_size, random_state=42)
         
-        if pilot_df.empty:
+        if sample_size == 0:
             return {}
         
-        sample_size = len(pilot_df)
-        
         # Use overrides or defaults
         dial_at_a_time = dial_at_a_time_override or self.config.DEFAULT_DIAL_AT_A_TIME
         max_attempts = max_attempts_override or self.config.DEFAULT_MAX_ATTEMPTS
@@ -93,7 +118,7 @@ class MetricsCalculator:
         baseline_connect_rate = baseline_metrics.get('connect_rate', 0)
         
         # Target uplift
-        target_connect_rate = baseline_connect_rate * (1 + self.config.TARGET_CONNECT_UPLIFT_PCT / 100)
+        target_connect_rate = self._target_connect_rate(baseline_connect_rate)
         
         # Success criteria
         success_connect_uplift = self.config.SUCCESS_CRITERIA_CONNECT_UPLIFT_PCT
@@ -110,10 +135,64 @@ class MetricsCalculator:
             'max_attempts': max_attempts
         }
     
-    def calculate_weekly_trends(self):
+    def _target_connect_rate(self, baseline_connect_rate):
+        """
+        Pilot connect rate target: the baseline plus the target uplift, at most 100%.
+        """
+        return min(baseline_connect_rate * (1 + self.config.TARGET_CONNECT_UPLIFT_PCT / 100), 100.0)
+    
+    @memoize('CONNECT_DISPOSITIONS', 'DEFAULT_DIAL_AT_A_TIME', 'DEFAULT_MAX_ATTEMPTS', 'TARGET_CONNECT_UPLIFT_PCT')
+    def calculate_pilot_sweep(self, dial_at_a_time, max_attempts, attempts_per_day):
+        """
+        Project pilot outcomes over a grid of dial-at-a-time x max attempts x attempts per day.
+        
+        Connect rate is the pilot target of calculate_pilot_metrics, which
+        does not depend on the settings, so both endpoints agree. With d lines
+        dialed at once, only the first answer of the d reaches the answer
+        event, so its share of logged calls is d / (2d - 1) (the baseline
+        approximation). Cooldown load is the contacts at or above max
+        attempts divided by the days it takes to get there (max attempts /
+        attempts per day).
+        """
+        dial = np.asarray(dial_at_a_time, dtype=np.float64)
+        attempts = np.asarray(max_attempts, dtype=np.int64)
+        per_day = np.asarray(attempts_per_day, dtype=np.float64)
+        
+        baseline = self.calculate_baseline_metrics()
+        answer_share = dial / (2 * dial - 1)
+        connect_rate = round(self._target_connect_rate(baseline.get('connect_rate', 0)), 2)
+        
+        # Contacts with Attempt Count >= m, from the cumulative attempt histogram
+        if 'Attempt Count' in self.powerlist_df.columns:
+            histogram = self.powerlist_index.attempt_distribution(self.powerlist_index.match(''))
+        else:
+            histogram = pd.Series(dtype=np.int64)
+        at_or_above = np.append(histogram.values[::-1].cumsum()[::-1], 0)
+        cooldown_contacts = at_or_above[np.searchsorted(histogram.index.values, attempts, side='left')]
+        cooldown_load = cooldown_contacts[:, None] * per_day[None, :] / attempts[:, None]
+        
+        shape = (len(dial), len(attempts), len(per_day))
+        return {
+            'dial_at_a_time': dial.astype(int).tolist(),
+            'max_attempts': attempts.tolist(),
+            'attempts_per_day': per_day.astype(int).tolist(),
+            'baseline_connect_rate': baseline.get('connect_rate', 0),
+            'connect_rate': np.full(shape, connect_rate).tolist(),
+            'answer_event_pct': np.broadcast_to(answer_share[:, None, None] * 100, shape).round(2).tolist(),
+            'cooldown_load': np.broadcast_to(cooldown_load[None, :, :], shape).round(2).tolist()
+        }
+    
+    @memoize('CONNECT_DISPOSITIONS')
+    def calculate_weekly_trends(self, granularity='week', start=None, end=None):
         """
-        Calculate weekly aggregated trends.
+        Calculate call trends per day, week or month, optionally limited to
+        calls with start <= datetime < end.
+        Answered from the rollup cube: each (day, disposition, ...) cell is
+        assigned a period bucket and weighted bincounts give every series.
         """
+        if granularity not in TREND_GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity}")
+        
         if self.kixie_df.empty:
             return {}
         
@@ -121,56 +200,88 @@ class MetricsCalculator:
         if 'datetime' not in self.kixie_df.columns:
             return {}
         
-        # Group by week
-        df = self.kixie_df.copy()
-        df['week'] = df['datetime'].dt.to_period('W')
+        cube = self._call_cube(start, end)
+        days = cube['day'].values
+        valid = ~np.isnat(days)
+        bucket_ids, bucket_starts = pd.factorize(_period_buckets(days[valid], granularity), sort=True)
         
-        weekly_stats = df.groupby('week').agg({
-            'phone_normalized': 'count',  # Total calls
-            'Disposition': lambda x: len(x[x.isin(self.config.CONNECT_DISPOSITIONS)])  # Connected calls
-        }).rename(columns={'phone_normalized': 'total_calls', 'Disposition': 'connected_calls'})
+        calls = cube['calls'].values[valid]
+        connected, voicemail = self._disposition_flags(cube['Disposition'])
+        connected, voicemail = connected[valid], voicemail[valid]
         
-        # Calculate voicemail and no answer
-        weekly_stats['voicemail_calls'] = df[df['Disposition'] == 'Left voicemail'].groupby('week').size()
-        weekly_stats['no_answer_calls'] = df[~df['Disposition'].isin(self.config.CONNECT_DISPOSITIONS)].groupby('week').size()
+        def per_bucket(weights):
+            return np.bincount(bucket_ids, weights=weights, minlength=len(bucket_starts)).astype(np.int64).tolist()
         
-        # Fill NaN values
-        weekly_stats = weekly_stats.fillna(0)
-        
-        # Convert to list format for Chart.js
-        weeks = [str(week) for week in weekly_stats.index]
+        labels = pd.DatetimeIndex(bucket_starts).to_period(TREND_GRANULARITIES[granularity])
         
         return {
-            'weeks': weeks,
-            'total_calls': weekly_stats['total_calls'].tolist(),
-            'connected_calls': weekly_stats['connected_calls'].tolist(),
-            'voicemail_calls': weekly_stats['voicemail_calls'].tolist(),
-            'no_answer_calls': weekly_stats['no_answer_calls'].tolist()
+            'granularity': granularity,
+            'weeks': [str(period) for period in labels],
+            'total_calls': per_bucket(cube['phone_calls'].values[valid]),
+            'connected_calls': per_bucket(calls * connected),
+            'voicemail_calls': per_bucket(calls * voicemail),
+            'no_answer_calls': per_bucket(calls * ~connected)
         }
     
+    def _disposition_flags(self, dispositions):
+        """
+        Connected and voicemail flags per row, computed on the distinct dispositions only.
+        """
+        codes, uniques = pd.factorize(dispositions)
+        uniques = pd.Index(uniques)
+        connected = np.append(uniques.isin(self.config.CONNECT_DISPOSITIONS), False)[codes]
+        voicemail = np.append(uniques == 'Left voicemail', False)[codes]
+        return connected, voicemail
+    
+    def _call_cube(self, start=None, end=None):
+        """
+        Call counts by day x agent x disposition x list for start <= datetime < end.
+        The cube built at load time answers whole-day ranges; other ranges
+        (and data loaded without a cube) aggregate the matching calls.
+        """
+        cube = self.data.get('kixie_cube')
+        whole_days = all(bound is None or bound == bound.normalize() for bound in (start, end))
+        
+        if cube is None or not whole_days:
+            kixie = time_window(self.kixie_df, start, end)
+            return build_call_cube(kixie, self.powerlist_df)
+        
+        if start is not None:
+            cube = cube[cube['day'] >= start]
+        if end is not None:
+            cube = cube[cube['day'] < end]
+        return cube
+    
+    def _phone_dispositions(self, start=None, end=None):
+        """
+        Call counts by phone number x disposition for start <= datetime < end.
+        """
+        table = self.data.get('kixie_phone_dispositions')
+        if table is not None and start is None and end is None:
+            return table
+        return build_phone_dispositions(time_window(self.kixie_df, start, end))
+    
+    @memoize()
     def calculate_attempt_distribution(self, list_name=None):
         """
         Calculate attempt distribution for a specific powerlist.
         """
-        df = self.powerlist_df.copy()
-        
-        if df.empty or 'Attempt Count' not in df.columns:
+        if self.powerlist_df.empty or 'Attempt Count' not in self.powerlist_df.columns:
             return {}
         
-        if list_name:
-            df = df[df['List Name'].str.contains(list_name, case=False, na=False)]
+        # Group by attempt count, over the lists whose name matches
+        index = self.powerlist_index
+        attempt_dist = index.attempt_distribution(index.match(list_name))
         
-        if df.empty:
+        if attempt_dist.empty:
             return {}
         
-        # Group by attempt count
-        attempt_dist = df['Attempt Count'].value_counts().sort_index()
-        
         return {
             'attempt_counts': attempt_dist.index.tolist(),
             'contact_counts': attempt_dist.values.tolist()
         }
     
+    @memoize('DEFAULT_MAX_ATTEMPTS', 'COOLDOWN_DAYS', daily=True)
     def calculate_cooldown_metrics(self):
         """
         Calculate cooldown-related metrics.
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+# Sources indexed at load time, stored in the data dict as phone_index_<source>
+PHONE_INDEX_SOURCES = ['kixie', 'telesign', 'powerlist']
+
+class PhoneKeys:
+    """
+    Sorted unique phone keys of one frame, with the number of rows per key
+    and the positions of each key's first and last row.
+    """
+    def __init__(self, keys, rows, first, last):
+        self.keys = keys
+        self.rows = rows
+        self.first = first
+        self.last = last
+
+    @classmethod
+    def build(cls, keys):
+        # Numbers without digits share the negative missing key; they match nothing
+        keys = np.asarray(keys, dtype=np.int64)
+        positions = np.flatnonzero(keys >= 0)
+        order = positions[np.argsort(keys[positions], kind='stable')]
+        if len(order) == 0:
+            empty = np.array([], dtype=np.int64)
+            return cls(empty, empty, empty, empty)
+
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        stops = np.r_[starts[1:], len(order)]
+        return cls(sorted_keys[starts], stops - starts, order[starts], order[stops - 1])
+
+    @classmethod
+    def from_frame(cls, frame):
+        return cls(frame['phone_key'].values, frame['rows'].values, frame['first'].values, frame['last'].values)
+
+    def frame(self):
+        return pd.DataFrame({'phone_key': self.keys, 'rows': self.rows, 'first': self.first, 'last': self.last})
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, keys):
+        """
+        (found mask, index into self.keys) of each key, by binary search.
+        """
+        keys = np.asarray(keys)
+        positions = np.searchsorted(self.keys, keys)
+        positions[positions == len(self.keys)] = 0
+        found = (self.keys[positions] == keys) if len(self.keys) else np.zeros(len(keys), dtype=bool)
+        return found, positions
+
+    def intersection(self, other):
+        """
+        Indices into self.keys and other.keys of the keys both hold.
+        """
+        _, mine, theirs = np.intersect1d(self.keys, other.keys, assume_unique=True, return_indices=True)
+        return mine, theirs
+
+    def joined_rows(self, other):
+        """
+        Rows an inner join of the two frames on phone key would produce.
+        """
+        mine, theirs = self.intersection(other)
+        return int(np.dot(self.rows[mine], other.rows[theirs]))
+
+    def shared_count(self, other):
+        """
+        Distinct keys held by both.
+        """
+        return len(self.intersection(other)[0])
+
+    def missing_count(self, other):
+        """
+        Distinct keys held here but not by other.
+        """
+        return len(self) - self.shared_count(other)
+
+class PhoneIndex:
+    """
+    PhoneKeys of the Kixie, Telesign and powerlist frames of one dataset
+    version, built once at load time so overlap counts are sorted-array
+    operations instead of merges.
+    """
+    def __init__(self, sources):
+        self.sources = sources
+
+    def __getitem__(self, source):
+        return self.sources[source]
+
+    @classmethod
+    def build(cls, keys):
+        """
+        Index from a {source: phone key array} dict.
+        """
+        return cls({source: PhoneKeys.build(keys.get(source, [])) for source in PHONE_INDEX_SOURCES})
+
+    @classmethod
+    def from_data(cls, data):
+        """
+        Index stored in a load_all_data dict, or None if it has none.
+        """
+        frames = {source: data.get(f'phone_index_{source}') for source in PHONE_INDEX_SOURCES}
+        if not all(isinstance(frame, pd.DataFrame) for frame in frames.values()):
+            return None
+        return cls({source: PhoneKeys.from_frame(frame) for source, frame in frames.items()})
+
+    def frames(self):
+        return {f'phone_index_{source}': keys.frame() for source, keys in self.sources.items()}
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+# Data dict keys the index is stored under (and persisted in the snapshot as)
+POWERLIST_INDEX_KEYS = ['powerlist_lists', 'powerlist_attempts']
+
+class PowerlistIndex:
+    """
+    Distinct powerlist list names with their sizes and attempt histograms.
+
+    Built once at load time and kept in the data dict as two small frames:
+    one row per list (name, row count) and contact counts per
+    (list, Attempt Count). List filters are matched against the distinct
+    names only, never against every contact row.
+    """
+    def __init__(self, lists, attempts):
+        self.lists = lists
+        self.attempts = attempts
+        self.names = pd.Index(np.asarray(lists['List Name'], dtype=object))
+
+    @classmethod
+    def build(cls, powerlist):
+        if powerlist is None or powerlist.empty or 'List Name' not in powerlist.columns:
+            return cls(
+                pd.DataFrame({'List Name': pd.Series(dtype=object), 'rows': pd.Series(dtype=np.int64)}),
+                pd.DataFrame({'list': pd.Series(dtype=np.int64), 'Attempt Count': pd.Series(dtype=np.int64), 'contacts': pd.Series(dtype=np.int64)}),
+            )
+
+        # Names in order of appearance, missing names kept as their own list (like unique())
+        codes, uniques = pd.factorize(powerlist['List Name'], use_na_sentinel=False)
+        counts = np.bincount(codes, minlength=len(uniques))
+        lists = pd.DataFrame({
+            'List Name': np.asarray(uniques, dtype=object),
+            'rows': counts.astype(np.int64),
+        })
+
+        if 'Attempt Count' in powerlist.columns:
+            frame = pd.DataFrame({'list': codes.astype(np.int64), 'Attempt Count': powerlist['Attempt Count'].values})
+            attempts = frame.dropna().groupby(['list', 'Attempt Count'], sort=True).size().rename('contacts').reset_index()
+        else:
+            attempts = pd.DataFrame({'list': pd.Series(dtype=np.int64), 'Attempt Count': pd.Series(dtype=np.int64), 'contacts': pd.Series(dtype=np.int64)})
+
+        return cls(lists, attempts)
+
+    @classmethod
+    def from_data(cls, data):
+        """
+        Index stored in the data dict, or one built from its powerlist for data loaded without it.
+        """
+        if all(isinstance(data.get(key), pd.DataFrame) for key in POWERLIST_INDEX_KEYS):
+            return cls(*(data[key] for key in POWERLIST_INDEX_KEYS))
+        return cls.build(data.get('powerlist', pd.DataFrame()))
+
+    def frames(self):
+        return dict(zip(POWERLIST_INDEX_KEYS, (self.lists, self.attempts)))
+
+    def match(self, pattern):
+        """
+        Mask over the distinct names, as str.contains(pattern, case=False, na=False) would give per row.
+        An empty pattern matches every list.
+        """
+        if not pattern:
+            return np.ones(len(self.names), dtype=bool)
+        named = self.names.notna()
+        mask = np.zeros(len(self.names), dtype=bool)
+        if named.any():
+            mask[named] = self.names[named].astype(str).str.contains(pattern, case=False, regex=True)
+        return mask
+
+    def size(self, mask):
+        """
+        Number of contacts in the selected lists.
+        """
+        return int(self.lists['rows'].values[mask].sum())
+
+    def attempt_distribution(self, mask):
+        """
+        Contacts per Attempt Count over the selected lists, sorted by attempt count.
+        """
+        selected = self.attempts[mask[self.attempts['list'].values]]
+        return selected.groupby('Attempt Count', sort=True)['contacts'].sum()
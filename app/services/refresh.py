@@ -0,0 +1,87 @@
+import threading
+from app.config import Config
+from app.adapters.cache import DataCache
+from app.services.metrics import MetricsCalculator
+from app.services.validation_merge import ValidationMerger
+from app.services.cooldown import CooldownManager
+
+def warm_metrics(data):
+    """
+    Compute the results the dashboard pages ask for first, so they are
+    memoized under the new data version before requests switch to it.
+    """
+    metrics_calc = MetricsCalculator(data)
+    metrics_calc.calculate_baseline_metrics()
+    metrics_calc.calculate_pilot_metrics()
+    metrics_calc.calculate_weekly_trends()
+    metrics_calc.calculate_attempt_distribution('')
+    metrics_calc.calculate_cooldown_metrics()
+
+    validation_merger = ValidationMerger(data)
+    validation_merger.calculate_data_hygiene_metrics()
+    validation_merger.cross_reference_data()
+
+    cooldown_manager = CooldownManager(data)
+    cooldown_manager.calculate_reattempt_potential()
+    cooldown_manager.get_cooldown_feed()
+
+class DataRefresher:
+    """
+    Background thread that rebuilds the cached dataset and warms metrics.
+
+    Requests for the same cache directory are coalesced; a forced request
+    (upload, admin refresh) reloads every source. Between requests the
+    thread polls the sources every REFRESH_POLL_SECONDS (0 disables polling),
+    so file changes are picked up without waiting for a visitor.
+    """
+    def __init__(self, poll_seconds=None, prepare=warm_metrics):
+        self.poll_seconds = poll_seconds if poll_seconds is not None else Config.REFRESH_POLL_SECONDS
+        self.prepare = prepare
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pending = {}
+        self._watched = set()
+        self._thread = None
+        self.idle = threading.Event()
+        self.idle.set()
+
+    def request(self, cache_dir, force=False):
+        """
+        Schedule a refresh of `cache_dir` and return immediately.
+        """
+        with self._lock:
+            self._pending[cache_dir] = self._pending.get(cache_dir, False) or force
+            self._watched.add(cache_dir)
+            self.idle.clear()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='data-refresh', daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            woke = self._wake.wait(self.poll_seconds or None)
+            self._wake.clear()
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                if not woke:
+                    pending = {cache_dir: False for cache_dir in self._watched}
+
+            for cache_dir, force in pending.items():
+                self.refresh(cache_dir, force)
+
+            with self._lock:
+                if not self._pending:
+                    self.idle.set()
+
+    def refresh(self, cache_dir, force=False):
+        """
+        Rebuild (if needed) and warm one cache directory in the calling thread.
+        """
+        try:
+            data = DataCache(cache_dir).refresh(force=force, prepare=self.prepare)
+            if data is not None and self.prepare is not None:
+                # Another process may have rebuilt; memoized results make this cheap if warm
+                self.prepare(data)
+        except Exception as e:
+            print(f"Warning: background data refresh failed: {e}")
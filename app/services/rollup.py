@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Dimensions of the call rollup cube, in order
+CUBE_DIMENSIONS = ['day', 'agent_name', 'Disposition', 'List Name']
+
+def _as_category(values):
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values
+    return values.astype('category')
+
+def _call_list_names(kixie, powerlist):
+    """
+    Powerlist list name of each call's number (first contact with that number), or NaN.
+    """
+    if powerlist is None or powerlist.empty or 'phone_key' not in powerlist.columns or 'phone_key' not in kixie.columns:
+        return pd.Categorical([np.nan] * len(kixie))
+
+    # Numbers without digits share the negative missing key; they match no contact
+    contacts = powerlist[powerlist['phone_key'].values >= 0].drop_duplicates('phone_key')
+    positions = pd.Index(contacts['phone_key'].values).get_indexer(kixie['phone_key'].values)
+    list_names = _as_category(contacts['List Name'].reset_index(drop=True)).array
+    return list_names.take(positions, allow_fill=True)
+
+def build_call_cube(kixie, powerlist=None):
+    """
+    Count calls by day x agent x disposition x list.
+    Returns a frame with the CUBE_DIMENSIONS columns (categoricals and a
+    datetime64 day, NaT/NaN kept as their own cells) plus 'calls' and
+    'phone_calls' (calls with a phone number).
+    """
+    if kixie is None or kixie.empty:
+        return pd.DataFrame({
+            'day': pd.Series(dtype='datetime64[ns]'),
+            **{dim: pd.Categorical([]) for dim in CUBE_DIMENSIONS[1:]},
+            'calls': pd.Series(dtype=np.int32),
+            'phone_calls': pd.Series(dtype=np.int32),
+        })
+
+    # Positional arrays only, so sliced frames with a non-default index line up
+    frame = pd.DataFrame({
+        'day': kixie['datetime'].dt.normalize().values if 'datetime' in kixie.columns else np.full(len(kixie), np.datetime64('NaT', 'ns')),
+        'agent_name': _as_category(kixie['agent_name']).array if 'agent_name' in kixie.columns else pd.Categorical(['Unknown'] * len(kixie)),
+        'Disposition': _as_category(kixie['Disposition']).array,
+        'List Name': _call_list_names(kixie, powerlist),
+        'has_phone': kixie['phone_normalized'].notna().values if 'phone_normalized' in kixie.columns else np.ones(len(kixie), dtype=bool),
+    })
+
+    cube = frame.groupby(CUBE_DIMENSIONS, observed=True, dropna=False, sort=False)['has_phone'].agg(['size', 'sum'])
+    cube = cube.rename(columns={'size': 'calls', 'sum': 'phone_calls'}).reset_index()
+    return cube.astype({'calls': np.int32, 'phone_calls': np.int32})
+
+def build_phone_dispositions(kixie):
+    """
+    Count calls by phone number x disposition, for per-number attempt metrics.
+    Calls without a number are left out, as groupby('phone_normalized') does.
+    """
+    if kixie is None or kixie.empty or 'phone_normalized' not in kixie.columns:
+        return pd.DataFrame({
+            'phone_key': pd.Series(dtype=np.int64),
+            'Disposition': pd.Categorical([]),
+            'calls': pd.Series(dtype=np.int32),
+        })
+
+    if 'phone_key' in kixie.columns:
+        keys = kixie['phone_key'].values
+    else:
+        keys = pd.factorize(kixie['phone_normalized'])[0].astype(np.int64)
+    known = kixie['phone_normalized'].notna().values
+    frame = pd.DataFrame({
+        'phone_key': keys[known],
+        'Disposition': _as_category(kixie['Disposition']).array[known],
+    })
+    table = frame.groupby(['phone_key', 'Disposition'], observed=True, dropna=False, sort=False).size()
+    return table.rename('calls').reset_index().astype({'calls': np.int32})
+
+def _contact_lists(powerlist):
+    """
+    List name of each number's first contact, indexed by phone_key.
+    """
+    if powerlist is None or powerlist.empty or 'phone_key' not in powerlist.columns:
+        return pd.Series(dtype=object)
+    contacts = powerlist[powerlist['phone_key'].values >= 0].drop_duplicates('phone_key')
+    return pd.Series(np.asarray(contacts['List Name'], dtype=object), index=contacts['phone_key'].values)
+
+def _merge_counts(table, delta, keys, values, sign=1):
+    """
+    Add (sign=1) or subtract (sign=-1) the counts of `delta` into `table`, by key.
+    Cells whose counts all drop to zero are removed.
+    """
+    if delta.empty:
+        return table
+    delta = delta.assign(**{value: delta[value] * sign for value in values})
+
+    columns = {}
+    for column in table.columns:
+        if isinstance(table[column].dtype, pd.CategoricalDtype):
+            columns[column] = union_categoricals([table[column].array, _as_category(delta[column]).array], ignore_order=True)
+        else:
+            columns[column] = np.concatenate([table[column].values, delta[column].values])
+    combined = pd.DataFrame(columns)
+
+    merged = combined.groupby(keys, observed=True, dropna=False, sort=False)[values].sum()
+    merged = merged[(merged != 0).any(axis=1)].reset_index()
+    return merged.astype({value: np.int32 for value in values})
+
+class RunningAggregates:
+    """
+    Call cube and per-number disposition counts, kept current from row deltas.
+
+    add() folds in appended call rows at a cost proportional to those rows
+    plus the (small) tables; totals, connected calls, per-number lost-race
+    counts and per-week disposition counts are all read off these tables.
+    When the powerlist is replaced, reattribute() moves only the calls of
+    numbers whose list changed. A rewritten call history is rebuilt.
+    """
+    def __init__(self, cube=None, phone_dispositions=None):
+        self.cube = cube if cube is not None else build_call_cube(None)
+        self.phone_dispositions = phone_dispositions if phone_dispositions is not None else build_phone_dispositions(None)
+
+    @classmethod
+    def build(cls, kixie, powerlist=None):
+        return cls(build_call_cube(kixie, powerlist), build_phone_dispositions(kixie))
+
+    @classmethod
+    def from_data(cls, data):
+        """
+        Aggregates stored in a load_all_data dict, or None if it has none.
+        """
+        if not isinstance(data.get('kixie_cube'), pd.DataFrame) or not isinstance(data.get('kixie_phone_dispositions'), pd.DataFrame):
+            return None
+        return cls(data['kixie_cube'], data['kixie_phone_dispositions'])
+
+    def frames(self):
+        return {'kixie_cube': self.cube, 'kixie_phone_dispositions': self.phone_dispositions}
+
+    def add(self, rows, powerlist=None):
+        """
+        Count call rows in, attributing them to lists with `powerlist`.
+        """
+        if rows is None or rows.empty:
+            return self
+        self.cube = _merge_counts(self.cube, build_call_cube(rows, powerlist), CUBE_DIMENSIONS, ['calls', 'phone_calls'])
+        self.phone_dispositions = _merge_counts(
+            self.phone_dispositions, build_phone_dispositions(rows), ['phone_key', 'Disposition'], ['calls']
+        )
+        return self
+
+    def reattribute(self, kixie, old_powerlist, new_powerlist):
+        """
+        Move the calls of numbers whose list changed from their old list to their new one.
+        """
+        old_lists, new_lists = _contact_lists(old_powerlist), _contact_lists(new_powerlist)
+        phones = old_lists.index.union(new_lists.index)
+        old_lists, new_lists = old_lists.reindex(phones), new_lists.reindex(phones)
+        changed = phones[~((old_lists == new_lists) | (old_lists.isna() & new_lists.isna())).values]
+        if len(changed) == 0 or kixie.empty or 'phone_key' not in kixie.columns:
+            return self
+
+        rows = kixie[np.isin(kixie['phone_key'].values, changed.values)]
+        cube = _merge_counts(self.cube, build_call_cube(rows, old_powerlist), CUBE_DIMENSIONS, ['calls', 'phone_calls'], -1)
+        self.cube = _merge_counts(cube, build_call_cube(rows, new_powerlist), CUBE_DIMENSIONS, ['calls', 'phone_calls'])
+        return self
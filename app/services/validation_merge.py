@@ -1,5 +1,28 @@
+import numpy as np
 import pandas as pd
-from app.services.data_loader import normalize_phones_last10
+from app.config import Config
+from app.services.data_loader import normalize_phones, normalize_phones_last10, time_window
+from app.services.phone_index import PhoneIndex, PhoneKeys
+from app.adapters.result_cache import memoize
+
+# Cross-reference categories and the columns of their detail rows
+CROSSREF_CATEGORIES = {
+    'validated_dialed': ['Phone Number', 'List Name', 'is_reachable', 'carrier', 'Disposition', 'datetime'],
+    'validated_only': ['Phone Number', 'List Name', 'is_reachable', 'carrier'],
+    'dialed_only': ['Phone Number', 'List Name', 'Disposition', 'datetime'],
+    'false_negatives': ['Phone Number', 'List Name', 'is_reachable', 'Disposition', 'datetime'],
+}
+
+# Telesign columns call outcomes are grouped by
+CARRIER_OUTCOME_DIMENSIONS = ['carrier', 'risk_level']
+
+def _phone_keys(df):
+    """
+    int64 phone keys of a frame, derived from phone_normalized for frames loaded without them.
+    """
+    if 'phone_key' in df.columns:
+        return df['phone_key'].values
+    return normalize_phones(df['phone_normalized'])[1].values
 
 class ValidationMerger:
     def __init__(self, data):
@@ -7,87 +30,145 @@ class ValidationMerger:
         self.kixie_df = data.get('kixie', pd.DataFrame())
         self.powerlist_df = data.get('powerlist', pd.DataFrame())
         self.telesign_df = data.get('telesign', pd.DataFrame())
+        self.config = Config()
+        self._phone_index = None
+    
+    @property
+    def phone_index(self):
+        """
+        Phone keys per source, from load time or built here for data loaded without them.
+        """
+        if self._phone_index is None:
+            self._phone_index = PhoneIndex.from_data(self.data) or PhoneIndex.build({
+                source: _phone_keys(df) for source, df in
+                [('kixie', self.kixie_df), ('telesign', self.telesign_df), ('powerlist', self.powerlist_df)]
+                if not df.empty
+            })
+        return self._phone_index
+    
+    def _source_keys(self, source, frame, mask):
+        """
+        (PhoneKeys, rows) of frame[mask]; the source's index is reused when frame is
+        the whole source and the mask keeps every row.
+        """
+        if mask.all():
+            if frame is getattr(self, f'{source}_df'):
+                return self.phone_index[source], frame
+            return PhoneKeys.build(_phone_keys(frame)), frame
+        rows = frame[mask]
+        return PhoneKeys.build(_phone_keys(rows)), rows
     
-    def cross_reference_data(self):
+    @memoize()
+    def cross_reference_frames(self, start=None, end=None):
         """
-        Cross-reference Powerlist ↔ Telesign ↔ Kixie data.
-        Returns validated_dialed, validated_only, dialed_only, carrier summary, false negatives.
+        Cross-reference Powerlist ↔ Telesign ↔ Kixie data, counting only
+        calls with start <= datetime < end as dialed when a range is given.
+        Returns a frame of detail rows per CROSSREF_CATEGORIES entry, plus
+        the carrier summary under 'carrier_summary'.
+        
+        Contacts are categorized by testing their phone key against the
+        sorted keys of validated and dialed numbers (the load-time phone
+        index when no rows are filtered out), so counts are per contact.
+        A number is unreachable if any of its Telesign records says so.
+        Detail rows carry the number's first Telesign record and its latest
+        call; false negatives carry their first unreachable record and
+        latest connect.
         """
         if self.powerlist_df.empty or self.telesign_df.empty or self.kixie_df.empty:
-            return self._empty_results()
-        
-        # Merge powerlist with telesign
-        powerlist_telesign = pd.merge(
-            self.powerlist_df,
-            self.telesign_df,
-            on='phone_normalized',
-            how='left',
-            suffixes=('_powerlist', '_telesign')
-        )
-        
-        # Merge with kixie calls
-        all_data = pd.merge(
-            powerlist_telesign,
-            self.kixie_df,
-            on='phone_normalized',
-            how='left',
-            suffixes=('', '_kixie')
-        )
-        
-        # Categorize contacts
-        validated_dialed = all_data[
-            (all_data['is_reachable'].notna()) & 
-            (all_data['datetime'].notna())
-        ]
-        
-        validated_only = all_data[
-            (all_data['is_reachable'].notna()) & 
-            (all_data['datetime'].isna())
-        ]
-        
-        dialed_only = all_data[
-            (all_data['is_reachable'].isna()) & 
-            (all_data['datetime'].notna())
-        ]
+            return self._empty_frames()
+        
+        kixie = time_window(self.kixie_df, start, end)
+        contacts = self.powerlist_df
+        contact_keys = _phone_keys(contacts)
+        
+        # First Telesign record of each validated number, and the latest call to each dialed number
+        validated_keys, telesign = self._source_keys('telesign', self.telesign_df, self.telesign_df['is_reachable'].notna().values)
+        validated_rows = telesign.iloc[validated_keys.first]
+        dialed_keys, calls = self._source_keys('kixie', kixie, kixie['datetime'].notna().values)
+        dialed_rows = calls.iloc[dialed_keys.last]
+        connects = calls['Disposition'].isin(['Connected', 'Left voicemail']).values
+        connect_keys, connect_calls = PhoneKeys.build(_phone_keys(calls)[connects]), calls[connects]
+        connect_rows = connect_calls.iloc[connect_keys.last]
+        unreachable_keys, unreachable_records = self._source_keys('telesign', self.telesign_df, (self.telesign_df['is_reachable'] == False).values)
+        unreachable_rows = unreachable_records.iloc[unreachable_keys.first]
+        
+        # Categorize contacts by membership of their number in each key set
+        validated, validated_at = validated_keys.lookup(contact_keys)
+        dialed, dialed_at = dialed_keys.lookup(contact_keys)
+        connected, connected_at = connect_keys.lookup(contact_keys)
+        unreachable, unreachable_at = unreachable_keys.lookup(contact_keys)
+        
+        def details(category, mask, calls_at=None, call_rows=None, records_at=validated_at, record_rows=validated_rows):
+            # Join only the selected contacts to their Telesign record and call
+            columns = CROSSREF_CATEGORIES[category]
+            rows = contacts.loc[mask, ['Phone Number', 'List Name']].reset_index(drop=True)
+            for column in ['is_reachable', 'carrier']:
+                if column in columns:
+                    rows[column] = record_rows[column].array.take(records_at[mask])
+            for column in ['Disposition', 'datetime']:
+                if column in columns:
+                    rows[column] = call_rows[column].array.take(calls_at[mask])
+            return rows[columns]
         
         # Carrier breakdown
-        carrier_summary = self.telesign_df.groupby('carrier').agg({
-            'phone_normalized': 'count',
-            'is_reachable': lambda x: (x == True).sum()  # Fix: Use True instead of 'Yes'
-        }).rename(columns={
-            'phone_normalized': 'total_validated',
-            'is_reachable': 'reachable_count'
-        })
+        carrier_summary = pd.DataFrame({
+            'carrier': self.telesign_df['carrier'].values,
+            'total_validated': self.telesign_df['phone_normalized'].notna().values,
+            'reachable_count': (self.telesign_df['is_reachable'] == True).values
+        }).groupby('carrier', observed=True).sum()
         carrier_summary['reachable_pct'] = (
             carrier_summary['reachable_count'] / carrier_summary['total_validated'] * 100
         ).round(2)
         
-        # False negatives (connected even when is_reachable = False)
-        false_negatives = all_data[
-            (all_data['is_reachable'] == False) & 
-            (all_data['Disposition'].isin(['Connected', 'Left voicemail']))
-        ]
-        
         return {
-            'validated_dialed': {
-                'count': len(validated_dialed),
-                'data': validated_dialed[['Phone Number', 'List Name', 'is_reachable', 'carrier', 'Disposition', 'datetime']].to_dict('records')
-            },
-            'validated_only': {
-                'count': len(validated_only),
-                'data': validated_only[['Phone Number', 'List Name', 'is_reachable', 'carrier']].to_dict('records')
-            },
-            'dialed_only': {
-                'count': len(dialed_only),
-                'data': dialed_only[['Phone Number', 'List Name', 'Disposition', 'datetime']].to_dict('records')
-            },
-            'carrier_summary': carrier_summary.to_dict('index'),
-            'false_negatives': {
-                'count': len(false_negatives),
-                'data': false_negatives[['Phone Number', 'List Name', 'is_reachable', 'Disposition', 'datetime']].to_dict('records')
-            }
+            'validated_dialed': details('validated_dialed', validated & dialed, dialed_at, dialed_rows),
+            'validated_only': details('validated_only', validated & ~dialed),
+            'dialed_only': details('dialed_only', ~validated & dialed, dialed_at, dialed_rows),
+            # False negatives (connected even when is_reachable = False), with their latest connect
+            'false_negatives': details('false_negatives', unreachable & connected, connected_at, connect_rows, unreachable_at, unreachable_rows),
+            'carrier_summary': carrier_summary.to_dict('index')
         }
     
+    @memoize()
+    def cross_reference_data(self, start=None, end=None, limit=None):
+        """
+        Cross-reference counts, carrier summary and detail records per category.
+        Returns validated_dialed, validated_only, dialed_only, carrier summary, false negatives;
+        with a limit only the first `limit` records of each category are included.
+        """
+        frames = self.cross_reference_frames(start, end)
+        results = {}
+        for category in CROSSREF_CATEGORIES:
+            frame = frames[category]
+            rows = frame if limit is None else frame.iloc[:limit]
+            results[category] = {'count': len(frame), 'data': rows.to_dict('records')}
+        results['carrier_summary'] = frames['carrier_summary']
+        return results
+    
+    @memoize()
+    def cross_reference_order(self, category, sort, ascending=True, start=None, end=None):
+        """
+        int32 positions of one category's detail rows ordered by `sort`
+        (stable, missing values last). Only the order is memoized per sort;
+        the rows stay in the cached cross_reference_frames.
+        """
+        column = self.cross_reference_frames(start, end)[category][sort].reset_index(drop=True)
+        order = column.sort_values(ascending=ascending, kind='stable', na_position='last').index
+        return order.values.astype(np.int32)
+    
+    def cross_reference_sorted(self, category, sort=None, ascending=True, start=None, end=None, offset=0, limit=None):
+        """
+        Detail rows of one category ordered by `sort`, or just rows
+        offset..offset + limit of that order.
+        """
+        frame = self.cross_reference_frames(start, end)[category]
+        stop = None if limit is None else offset + limit
+        if sort is None:
+            return frame.iloc[offset:stop]
+        order = self.cross_reference_order(category, sort, ascending, start, end)
+        return frame.take(order[offset:stop]).reset_index(drop=True)
+    
+    @memoize()
     def calculate_data_hygiene_metrics(self):
         """
         Calculate data hygiene metrics.
@@ -99,14 +180,9 @@ class ValidationMerger:
         reachable_count = len(self.telesign_df[self.telesign_df['is_reachable'] == True])  # Fix: Use True instead of 'Yes'
         invalid_count = total_validated - reachable_count
         
-        # Count of validated numbers actually dialed
+        # Count of validated numbers actually dialed (rows of a telesign x kixie join on phone)
         if not self.kixie_df.empty:
-            validated_dialed_count = len(pd.merge(
-                self.telesign_df,
-                self.kixie_df,
-                on='phone_normalized',
-                how='inner'
-            ))
+            validated_dialed_count = self.phone_index['telesign'].joined_rows(self.phone_index['kixie'])
         else:
             validated_dialed_count = 0
         
@@ -119,13 +195,74 @@ class ValidationMerger:
             'validated_dialed_pct': round(validated_dialed_count / total_validated * 100, 2) if total_validated > 0 else 0
         }
     
-    def _empty_results(self):
-        """Return empty results when data is missing."""
-        return {
-            'validated_dialed': {'count': 0, 'data': []},
-            'validated_only': {'count': 0, 'data': []},
-            'dialed_only': {'count': 0, 'data': []},
-            'carrier_summary': {},
-            'false_negatives': {'count': 0, 'data': []}
-        }
-
+    @memoize('CONNECT_DISPOSITIONS')
+    def calculate_carrier_outcomes(self, start=None, end=None):
+        """
+        Connect, voicemail and false-negative rates of the calls with
+        start <= datetime < end, per Telesign carrier and per risk level.
+        
+        Each call's phone key is looked up once in a hash index of the
+        validated numbers (their first Telesign record), so a call is never
+        joined to more than one record, and the calls are then counted by
+        group x outcome in a single bincount. The false-negative rate is the
+        share of calls to numbers any Telesign record marks unreachable that
+        connected.
+        """
+        results = {'validated_calls': 0, 'unvalidated_calls': 0}
+        results.update({dimension: {} for dimension in CARRIER_OUTCOME_DIMENSIONS})
+        if self.telesign_df.empty or self.kixie_df.empty:
+            return results
+        
+        kixie = time_window(self.kixie_df, start, end)
+        validated = self.phone_index['telesign']
+        records = self.telesign_df.iloc[validated.first]
+        positions = pd.Index(validated.keys).get_indexer(_phone_keys(kixie))
+        matched = positions >= 0
+        positions = positions[matched]
+        results['validated_calls'] = int(matched.sum())
+        results['unvalidated_calls'] = int(len(kixie) - matched.sum())
+        
+        # Outcome of each matched call as bits: 1 connected, 2 voicemail, 4 number marked unreachable
+        codes, uniques = pd.factorize(kixie['Disposition'].values[matched])
+        uniques = pd.Index(uniques)
+        connected = np.append(uniques.isin(self.config.CONNECT_DISPOSITIONS), False)[codes]
+        voicemail = np.append(uniques == 'Left voicemail', False)[codes]
+        unreachable_keys = self._source_keys('telesign', self.telesign_df, (self.telesign_df['is_reachable'] == False).values)[0]
+        unreachable = unreachable_keys.lookup(validated.keys)[0][positions]
+        outcomes = connected * 1 + voicemail * 2 + unreachable * 4
+        classes = np.arange(8)
+        
+        def rate(part, whole):
+            return round(part / whole * 100, 2) if whole > 0 else 0
+        
+        for dimension in CARRIER_OUTCOME_DIMENSIONS:
+            if dimension not in records.columns:
+                continue
+            group_codes, names = pd.factorize(records[dimension].astype(object).fillna('Unknown'))
+            counts = np.bincount(group_codes[positions] * 8 + outcomes, minlength=len(names) * 8).reshape(len(names), 8)
+            for name, row in zip(names, counts):
+                calls = int(row.sum())
+                if calls == 0:
+                    continue
+                connected_calls = int(row[classes & 1 > 0].sum())
+                voicemail_calls = int(row[classes & 2 > 0].sum())
+                unreachable_calls = int(row[classes & 4 > 0].sum())
+                false_negatives = int(row[classes & 5 == 5].sum())
+                results[dimension][str(name)] = {
+                    'calls': calls,
+                    'connected_calls': connected_calls,
+                    'voicemail_calls': voicemail_calls,
+                    'unreachable_calls': unreachable_calls,
+                    'false_negatives': false_negatives,
+                    'connect_rate': rate(connected_calls, calls),
+                    'voicemail_rate': rate(voicemail_calls, calls),
+                    'false_negative_rate': rate(false_negatives, unreachable_calls)
+                }
+        
+        return results
+    
+    def _empty_frames(self):
+        """Return empty detail frames when data is missing."""
+        frames = {category: pd.DataFrame(columns=columns) for category, columns in CROSSREF_CATEGORIES.items()}
+        frames['carrier_summary'] = {}
+        return frames
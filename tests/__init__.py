@@ -1,2 +1,6 @@
 # Tests package
+import os
 
+# Apps built by the tests rebuild inside requests; tests that need a
+# background DataRefresher install their own
+os.environ['BACKGROUND_REFRESH'] = 'false'
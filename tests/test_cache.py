@@ -0,0 +1,549 @@
+import contextlib
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime
+from unittest import mock
+import numpy as np
+import pandas as pd
+import pytz
+from app.config import Config
+from app.adapters.cache import DataCache
+from app.adapters.cache_backends import RedisBackend, _file_lock
+from app.adapters.result_cache import ResultCache
+from app.adapters.snapshot import POINTER_NAME, read_manifest, read_snapshot, write_snapshot
+from app.services.data_loader import check_sources, load_all_data
+from app.services.refresh import DataRefresher, warm_metrics
+from app.services.validation_merge import ValidationMerger
+from tests.test_data_loader import KIXIE_CSV, TELESIGN_CSV, POWERLIST_CSV, write_csv
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def test_round_trip_preserves_dtypes(self):
+        """Test that frames come back with identical values and dtypes."""
+        kixie = pd.DataFrame({
+            'datetime': pd.to_datetime(['2024-01-01 09:00', None, '2024-01-02 10:30']),
+            'Disposition': pd.Categorical(['Connected', 'Busy', None]),
+            'Duration': np.array([200, 0, 15], dtype=np.int16),
+            'phone_normalized': ['1234567890', None, '0987654321'],
+            'phone_key': np.array([11234567890, -1, 10987654321], dtype=np.int64),
+            'is_reachable': [True, 'Yes', np.nan],
+            'risk_score': [None, 3, 0.5],
+            'Attempt Count': pd.array([1, None, 3], dtype='Int64'),
+            'called_at': pd.to_datetime(['2024-01-01', '2024-01-02', '2024-01-03']).tz_localize('Asia/Manila'),
+        })
+        data = {
+            'kixie': kixie,
+            'powerlist': pd.DataFrame(),
+            'kixie_ingest': {'offset': 10, 'read_args': {'header': None, 'names': ['a', 'b']}},
+            'last_updated': datetime(2024, 1, 3, 8, 0, tzinfo=pytz.UTC).astimezone(pytz.timezone('Asia/Manila')),
+        }
+
+        write_snapshot(self.tmp_dir.name + '/cache', data)
+        restored = read_snapshot(self.tmp_dir.name + '/cache')
+
+        pd.testing.assert_frame_equal(restored['kixie'], kixie)
+        self.assertTrue(restored['powerlist'].empty)
+        self.assertEqual(restored['kixie_ingest'], data['kixie_ingest'])
+        self.assertEqual(restored['last_updated'], data['last_updated'])
+
+    def test_mixed_columns_are_not_pickled(self):
+        """Test that object columns round-trip without pickle and pickled manifests are refused."""
+        directory = self.tmp_dir.name + '/cache'
+        telesign = pd.DataFrame({'is_reachable': [True, None, False]})
+        write_snapshot(directory, {'telesign': telesign})
+
+        with mock.patch('numpy.load', wraps=np.load) as load:
+            restored = read_snapshot(directory)
+        self.assertTrue(all(call.kwargs.get('allow_pickle') is False for call in load.call_args_list))
+        pd.testing.assert_frame_equal(restored['telesign'], telesign)
+        self.assertIs(restored['telesign']['is_reachable'][0], True)
+
+        # A manifest listing a pickled column (older writers, or a tampered shared snapshot)
+        manifest = read_manifest(directory)
+        manifest['frames']['telesign']['columns'][0] = {'name': 'is_reachable', 'kind': 'object', 'values': '0.pkl.npy'}
+        with open(os.path.join(directory, manifest['snapshot'], 'manifest.json'), 'w') as f:
+            json.dump(manifest, f)
+        self.assertIsNone(read_manifest(directory))
+        self.assertIsNone(read_snapshot(directory))
+
+    def test_missing_snapshot(self):
+        """Test that a directory without a manifest is not a snapshot."""
+        self.assertIsNone(read_snapshot(self.tmp_dir.name))
+
+    def test_rewrite_keeps_previous_snapshot_readable(self):
+        """Test that rewriting swaps the pointer and prunes all but recent snapshots."""
+        directory = self.tmp_dir.name + '/cache'
+        write_snapshot(directory, {'powerlist': pd.DataFrame({'a': [1]})})
+        old_manifest = read_manifest(directory)
+
+        for value in [2, 3, 4]:
+            write_snapshot(directory, {'powerlist': pd.DataFrame({'a': [value]})})
+
+        self.assertEqual(read_snapshot(directory)['powerlist']['a'].tolist(), [4])
+        self.assertEqual(len([name for name in os.listdir(directory) if name != POINTER_NAME]), 3)
+        self.assertIsNone(read_manifest(directory + '/missing'))
+        self.assertNotEqual(read_manifest(directory)['snapshot'], old_manifest['snapshot'])
+
+class TestDataCache(unittest.TestCase):
+    def setUp(self):
+        # Rebuild inside the request; background refresh is tested separately
+        patcher = mock.patch.object(DataCache, 'refresher', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.cache_dir = os.path.join(self.tmp_dir.name, 'cache')
+        self.paths = {
+            'DATA_KIXIE': write_csv(self.tmp_dir.name, 'kixie_call_history.csv', KIXIE_CSV),
+            'DATA_TELESIGN_WITH': write_csv(self.tmp_dir.name, 'telesign_with_live.csv', TELESIGN_CSV),
+            'DATA_TELESIGN_WITHOUT': write_csv(self.tmp_dir.name, 'telesign_without_live.csv', TELESIGN_CSV),
+            'DATA_POWERLIST': write_csv(self.tmp_dir.name, 'powerlist_contacts.csv', POWERLIST_CSV),
+        }
+        for name, path in self.paths.items():
+            patcher = mock.patch.object(Config, name, path)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(DataCache(self.cache_dir).clear_cache)
+
+    def rewrite(self, name, content):
+        with open(self.paths[name], 'w') as f:
+            f.write(content)
+        # Make sure the mtime moves even on coarse-grained filesystems
+        stat = os.stat(self.paths[name])
+        os.utime(self.paths[name], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    def test_process_cache_reuses_frames(self):
+        """Test that later requests get the already-loaded frames without reading the snapshot."""
+        first = DataCache(self.cache_dir).get_data()
+
+        with mock.patch('app.adapters.cache_backends.read_snapshot') as read, \
+                mock.patch('app.adapters.cache.load_all_data') as load:
+            second = DataCache(self.cache_dir).get_data()
+            read.assert_not_called()
+            load.assert_not_called()
+
+        self.assertIs(second['kixie'], first['kixie'])
+
+    def test_frames_are_mapped_from_snapshot(self):
+        """Test that cached columns are read-only views of the snapshot files."""
+        kixie = DataCache(self.cache_dir).get_data()['kixie']
+
+        self.assertIsInstance(kixie['phone_key'].values.base, np.memmap)
+        self.assertFalse(kixie['datetime'].values.flags.writeable)
+        self.assertIsInstance(kixie['phone_normalized'].dtype, pd.CategoricalDtype)
+        self.assertFalse(kixie['phone_normalized'].array.codes.flags.writeable)
+
+        with mock.patch.object(Config, 'CACHE_MMAP', False):
+            DataCache(self.cache_dir).clear_cache()
+            kixie = DataCache(self.cache_dir).get_data()['kixie']
+        self.assertTrue(kixie['phone_key'].values.flags.writeable)
+        self.assertEqual(kixie['phone_normalized'].dtype, object)
+
+    def test_process_cache_sees_rewritten_snapshot(self):
+        """Test that a snapshot written by another process replaces the in-memory copy."""
+        data = DataCache(self.cache_dir).get_data()
+
+        data['telesign'] = pd.DataFrame({'carrier': ['AT&T', 'Sprint']})
+        write_snapshot(self.cache_dir, data)
+
+        self.assertEqual(DataCache(self.cache_dir).get_data()['telesign']['carrier'].tolist(), ['AT&T', 'Sprint'])
+
+    def test_clear_cache_reloads(self):
+        """Test that clearing the cache forces a reload."""
+        cache = DataCache(self.cache_dir)
+        cache.get_data()
+        cache.clear_cache()
+
+        with mock.patch('app.adapters.cache.load_all_data', wraps=load_all_data) as load:
+            cache.get_data()
+            self.assertEqual(load.call_count, 1)
+
+    def test_changed_source_reloads_only_that_source(self):
+        """Test that a changed powerlist is reloaded while other sources are reused."""
+        cache = DataCache(self.cache_dir)
+        first = cache.get_data()
+
+        self.rewrite('DATA_POWERLIST', POWERLIST_CSV + '+1999999999,0,2,NAICS Retail\n')
+        with mock.patch('app.services.data_loader.load_telesign_file') as telesign, \
+                mock.patch('app.services.data_loader.load_kixie_incremental') as kixie:
+            second = cache.get_data()
+            telesign.assert_not_called()
+            kixie.assert_not_called()
+
+        self.assertEqual(len(second['powerlist']), 3)
+        pd.testing.assert_frame_equal(second['kixie'], first['kixie'])
+        pd.testing.assert_frame_equal(second['telesign'], first['telesign'])
+        self.assertNotEqual(second['version'], first['version'])
+
+    def test_changed_telesign_file_keeps_other_file(self):
+        """Test that reloading one Telesign file keeps the other file's rows."""
+        cache = DataCache(self.cache_dir)
+        cache.get_data()
+
+        self.rewrite('DATA_TELESIGN_WITHOUT', TELESIGN_CSV + '+1999999999,False,High,Sprint,Phone ID Live\n')
+        telesign = cache.get_data()['telesign']
+
+        self.assertEqual(telesign['source_file'].tolist(), ['with_live'] * 2 + ['without_live'] * 3)
+
+    def test_touched_source_with_same_content(self):
+        """Test that a touched but identical file is not reloaded when hashing is enabled."""
+        with mock.patch.object(Config, 'CACHE_HASH_SOURCES', True):
+            cache = DataCache(self.cache_dir)
+            cache.get_data()
+
+            self.rewrite('DATA_POWERLIST', POWERLIST_CSV)
+            with mock.patch('app.adapters.cache.load_all_data') as load, \
+                    mock.patch('app.adapters.cache_backends.write_snapshot') as write:
+                cache.get_data()
+                cache.get_data()
+                load.assert_not_called()
+                write.assert_not_called()
+
+            # Another process picks up the recorded signatures with the snapshot
+            cache._forget()
+            with mock.patch('app.services.data_loader._file_sha1') as sha1:
+                data = cache.get_data()
+                sha1.assert_not_called()
+            self.assertEqual(data['sources']['powerlist']['mtime_ns'], os.stat(self.paths['DATA_POWERLIST']).st_mtime_ns)
+
+    def test_touched_source_during_rebuild(self):
+        """Test that signatures are not recorded while another process holds the rebuild lock."""
+        with mock.patch.object(Config, 'CACHE_HASH_SOURCES', True):
+            cache = DataCache(self.cache_dir)
+            cache.get_data()
+
+            self.rewrite('DATA_POWERLIST', POWERLIST_CSV)
+            with _file_lock(cache.backend.lock_path), \
+                    mock.patch('app.adapters.cache.load_all_data') as load, \
+                    mock.patch.object(cache.backend, 'store_sources') as store:
+                data = cache.get_data()
+                load.assert_not_called()
+                store.assert_not_called()
+            self.assertEqual(data['sources']['powerlist']['mtime_ns'], os.stat(self.paths['DATA_POWERLIST']).st_mtime_ns)
+
+class TestRebuildLock(unittest.TestCase):
+    def setUp(self):
+        # Rebuild inside the request; background refresh is tested separately
+        patcher = mock.patch.object(DataCache, 'refresher', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.cache = DataCache(os.path.join(self.tmp_dir.name, 'cache'))
+        self.addCleanup(self.cache.clear_cache)
+
+    def hold_lock(self, seconds):
+        """Hold the rebuild lock from another thread, as a rebuilding worker would."""
+        held = threading.Event()
+
+        def hold():
+            with _file_lock(self.cache.backend.lock_path):
+                held.set()
+                time.sleep(seconds)
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        self.addCleanup(thread.join)
+        held.wait()
+
+    def test_serves_stale_copy_while_another_process_rebuilds(self):
+        """Test that a worker with a stale copy does not start a second rebuild."""
+        self.cache.cache_data({'powerlist': pd.DataFrame({'a': [1]}), 'sources': None})
+        self.hold_lock(0.5)
+
+        with mock.patch('app.adapters.cache.load_all_data') as load:
+            data = self.cache.get_data()
+            load.assert_not_called()
+
+        self.assertEqual(data['powerlist']['a'].tolist(), [1])
+
+    def test_waits_for_rebuild_without_a_copy(self):
+        """Test that a worker without a copy waits and then uses the rebuilt snapshot."""
+        _, sources = check_sources(None)
+        self.hold_lock(0.3)
+        threading.Timer(0.1, self.cache.cache_data, [{'powerlist': pd.DataFrame({'a': [2]}), 'sources': sources}]).start()
+
+        with mock.patch('app.adapters.cache.load_all_data') as load:
+            data = self.cache.get_data()
+            load.assert_not_called()
+
+        self.assertEqual(data['powerlist']['a'].tolist(), [2])
+
+class TestBackgroundRefresh(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.cache_dir = os.path.join(self.tmp_dir.name, 'cache')
+        self.powerlist_path = write_csv(self.tmp_dir.name, 'powerlist_contacts.csv', POWERLIST_CSV)
+        patchers = [mock.patch.object(Config, name, write_csv(self.tmp_dir.name, name + '.csv', content))
+                    for name, content in [('DATA_KIXIE', KIXIE_CSV), ('DATA_TELESIGN_WITH', TELESIGN_CSV), ('DATA_TELESIGN_WITHOUT', TELESIGN_CSV)]]
+        patchers.append(mock.patch.object(Config, 'DATA_POWERLIST', self.powerlist_path))
+        self.prepare = mock.Mock()
+        self.refresher = DataRefresher(poll_seconds=0, prepare=self.prepare)
+        patchers.append(mock.patch.object(DataCache, 'refresher', self.refresher))
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(DataCache(self.cache_dir).clear_cache)
+
+    def wait(self):
+        self.assertTrue(self.refresher.idle.wait(10))
+
+    def test_serves_previous_data_until_refreshed(self):
+        """Test that a changed source is rebuilt in the background while the old data is served."""
+        cache = DataCache(self.cache_dir)
+        first = cache.get_data()
+
+        with open(self.powerlist_path, 'a') as f:
+            f.write('+1999999999,0,2,NAICS Retail\n')
+        stat = os.stat(self.powerlist_path)
+        os.utime(self.powerlist_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        with mock.patch.object(self.refresher, 'request', wraps=self.refresher.request) as request:
+            stale = cache.get_data()
+            request.assert_called_once_with(self.cache_dir)
+        self.assertEqual(stale['version'], first['version'])
+
+        self.wait()
+        refreshed = cache.get_data()
+        self.assertEqual(len(refreshed['powerlist']), 3)
+        self.assertEqual(self.prepare.call_args_list[0].args[0]['version'], refreshed['version'])
+
+    def test_forced_refresh_reloads_everything(self):
+        """Test that an admin refresh reloads all sources and warms metrics."""
+        cache = DataCache(self.cache_dir)
+        cache.get_data()
+
+        with mock.patch('app.adapters.cache.load_all_data', wraps=load_all_data) as load:
+            self.assertTrue(cache.request_refresh(force=True))
+            self.wait()
+            load.assert_called_once_with()
+        self.prepare.assert_called()
+
+    def test_warm_metrics_memoizes_dashboard_results(self):
+        """Test that warmed results are served without recomputation."""
+        data = DataCache(self.cache_dir).get_data()
+        warm_metrics(data)
+
+        with mock.patch('pandas.merge') as merge:
+            ValidationMerger(data).calculate_data_hygiene_metrics()
+            merge.assert_not_called()
+
+class FakeRedis:
+    """In-process stand-in for the redis-py calls RedisBackend makes."""
+    def __init__(self):
+        self.values = {}
+        self.ttls = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None, px=None, nx=False):
+        with self.lock:
+            if nx and key in self.values:
+                return None
+            self.values[key] = value.encode() if isinstance(value, str) else value
+            self.ttls[key] = ex if ex is not None else (px / 1000 if px is not None else None)
+            return True
+
+    def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+
+    def eval(self, script, numkeys, key, owner, *args):
+        # Only the lock scripts: compare the token, then pexpire or delete
+        with self.lock:
+            if self.values.get(key) != owner.encode():
+                return 0
+            if 'pexpire' in script:
+                self.ttls[key] = int(args[0]) / 1000
+            else:
+                del self.values[key]
+            return 1
+
+class DownRedis:
+    """Client for a Redis server that cannot be reached."""
+    def get(self, *args, **kwargs):
+        raise ConnectionError('Connection refused')
+
+    set = delete = eval = get
+
+class TestRedisBackend(unittest.TestCase):
+    def setUp(self):
+        # Rebuild inside the request; background refresh is tested separately
+        patcher = mock.patch.object(DataCache, 'refresher', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.redis = FakeRedis()
+        self.sources = check_sources(None)[1]
+
+    def cache(self, host):
+        """A DataCache as seen from one app container, with its own local mirror."""
+        backend = RedisBackend(client=self.redis, prefix='test', mirror_dir=os.path.join(self.tmp_dir.name, host), ttl=60, result_ttl=30)
+        cache = DataCache(backend=backend)
+        self.addCleanup(cache._forget)
+        return cache
+
+    def test_snapshot_shared_between_containers(self):
+        """Test that a snapshot stored by one container is loaded by another without reloading."""
+        self.cache('web-1').cache_data({'powerlist': pd.DataFrame({'a': [1, 2]}), 'sources': self.sources})
+
+        with mock.patch('app.adapters.cache.load_all_data') as load:
+            data = self.cache('web-2').get_data()
+            load.assert_not_called()
+
+        self.assertEqual(data['powerlist']['a'].tolist(), [1, 2])
+        self.assertIsInstance(data['powerlist']['a'].values.base, np.memmap)
+        self.assertEqual(self.redis.ttls['test:snapshot:current'], 60)
+
+    def test_containers_with_own_source_copies(self):
+        """Test that containers with their own copies of identical files do not invalidate each other's snapshot."""
+        def as_host(host):
+            directory = os.path.join(self.tmp_dir.name, host + '-data')
+            os.makedirs(directory, exist_ok=True)
+            stack = contextlib.ExitStack()
+            stack.enter_context(mock.patch.object(Config, 'CACHE_BACKEND', 'redis'))
+            for attr, name, content in [('DATA_KIXIE', 'kixie_call_history.csv', KIXIE_CSV),
+                                        ('DATA_TELESIGN_WITH', 'telesign_with_live.csv', TELESIGN_CSV),
+                                        ('DATA_TELESIGN_WITHOUT', 'telesign_without_live.csv', TELESIGN_CSV),
+                                        ('DATA_POWERLIST', 'powerlist_contacts.csv', POWERLIST_CSV)]:
+                path = os.path.join(directory, name)
+                if not os.path.exists(path):
+                    write_csv(directory, name, content)
+                stack.enter_context(mock.patch.object(Config, attr, path))
+            return stack
+
+        with as_host('web-1'):
+            first = self.cache('web-1').get_data()
+        published = self.redis.values['test:snapshot:current']
+
+        with mock.patch('app.adapters.cache.load_all_data') as load:
+            with as_host('web-2'):
+                second = self.cache('web-2').get_data()
+            with as_host('web-1'):
+                self.cache('web-1')._forget()
+                again = self.cache('web-1').get_data()
+            load.assert_not_called()
+
+        self.assertEqual(self.redis.values['test:snapshot:current'], published)
+        self.assertEqual(second['version'], first['version'])
+        self.assertIn('web-2-data', second['sources']['kixie']['path'])
+        self.assertIn('web-1-data', again['sources']['kixie']['path'])
+
+    def test_snapshot_stored_in_chunks(self):
+        """Test that a snapshot is published as bounded chunks and reassembled by another container."""
+        frame = pd.DataFrame({'a': np.arange(1000, dtype=np.int64)})
+        with mock.patch.object(Config, 'CACHE_REDIS_CHUNK_BYTES', 4096):
+            name = self.cache('web-1').backend.store({'powerlist': frame, 'sources': self.sources})
+
+        chunks = [value for key, value in self.redis.values.items() if key.startswith(f'test:snapshot:{name}:')]
+        self.assertGreater(len(chunks), 2)
+        self.assertTrue(all(len(chunk) <= 4096 for chunk in chunks))
+        self.assertEqual(self.redis.values[f'test:snapshot:{name}'], len(chunks))
+        self.assertEqual(self.cache('web-2').get_data()['powerlist']['a'].tolist(), frame['a'].tolist())
+
+    def test_outage_warning_is_rate_limited(self):
+        """Test that requests during a Redis outage do not each print a warning."""
+        cache = self.cache('web-1')
+        cache.cache_data({'powerlist': pd.DataFrame({'a': [1]}), 'sources': self.sources})
+        cache.backend.client = DownRedis()
+
+        with mock.patch('builtins.print') as printed:
+            for _ in range(5):
+                cache.get_data()
+        self.assertEqual(sum('Redis unavailable' in call.args[0] for call in printed.call_args_list), 1)
+
+    def test_clear_and_rebuild(self):
+        """Test that clearing removes the shared pointer and the next request rebuilds."""
+        first = self.cache('web-1')
+        first.cache_data({'powerlist': pd.DataFrame({'a': [1]}), 'sources': self.sources})
+        first.clear_cache()
+
+        self.assertIsNone(self.cache('web-2').get_cached_data())
+        with mock.patch('app.adapters.cache.load_all_data', return_value={'powerlist': pd.DataFrame({'a': [3]}), 'sources': self.sources}) as load:
+            self.assertEqual(self.cache('web-2').get_data()['powerlist']['a'].tolist(), [3])
+            self.assertEqual(load.call_count, 1)
+
+    def test_lock_is_exclusive(self):
+        """Test that only one holder gets the Redis rebuild lock."""
+        backend = self.cache('web-1').backend
+        with backend.lock(timeout=0) as first:
+            with backend.lock(timeout=0) as second:
+                self.assertTrue(first)
+                self.assertFalse(second)
+        with backend.lock(timeout=0) as again:
+            self.assertTrue(again)
+
+    def test_lock_is_renewed_and_released_by_its_owner(self):
+        """Test that a held lock keeps being extended and is only deleted while it is still ours."""
+        backend = self.cache('web-1').backend
+        key = backend._key('lock')
+        with mock.patch.object(Config, 'CACHE_LOCK_LEASE', 0.15), mock.patch.object(self.redis, 'eval', wraps=self.redis.eval) as evals:
+            with backend.lock(timeout=0) as acquired:
+                self.assertTrue(acquired)
+                time.sleep(0.2)
+                self.assertTrue(any('pexpire' in call.args[0] for call in evals.call_args_list))
+
+                # The lease ran out and another container took the lock
+                self.redis.values[key] = b'other'
+            self.assertEqual(self.redis.values[key], b'other')
+
+    def test_serves_local_copy_while_redis_is_down(self):
+        """Test that a Redis outage serves the local snapshot and rebuilds under a file lock."""
+        cache = self.cache('web-1')
+        cache.cache_data({'powerlist': pd.DataFrame({'a': [1, 2]}), 'sources': self.sources})
+        cache.backend.client = DownRedis()
+
+        with mock.patch('app.adapters.cache.load_all_data') as load:
+            self.assertEqual(cache.get_data()['powerlist']['a'].tolist(), [1, 2])
+            cache._forget()
+            self.assertEqual(cache.get_data()['powerlist']['a'].tolist(), [1, 2])
+            load.assert_not_called()
+
+        with cache.backend.lock(timeout=0) as first:
+            with cache.backend.lock(timeout=0) as second:
+                self.assertTrue(first)
+                self.assertFalse(second)
+
+        rebuilt = cache.cache_data({'powerlist': pd.DataFrame({'a': [3]}), 'sources': self.sources})
+        self.assertEqual(rebuilt['powerlist']['a'].tolist(), [3])
+        self.assertEqual(cache.get_cached_data()['powerlist']['a'].tolist(), [3])
+        cache.clear_cache()
+        self.assertIsNone(cache.get_cached_data())
+
+    def test_results_shared_between_processes(self):
+        """Test that metric payloads stored by one process are found by another."""
+        backend = self.cache('web-1').backend
+        ResultCache(backend=backend).set(('v1', 'baseline'), {'connect_rate': 50.0})
+
+        self.assertEqual(ResultCache(backend=backend).get(('v1', 'baseline')), {'connect_rate': 50.0})
+        self.assertIsNone(ResultCache(backend=backend).get(('v2', 'baseline')))
+        self.assertIn(30, self.redis.ttls.values())
+        self.assertEqual(json.loads(self.redis.values[backend._result_key(('v1', 'baseline'))]), {'connect_rate': 50.0})
+
+    def test_rich_results_stay_in_process(self):
+        """Test that frames, non-JSON and oversized results are not written to Redis."""
+        backend = self.cache('web-1').backend
+        local = ResultCache(backend=backend)
+        frame = pd.DataFrame({'a': [1]})
+        local.set(('v1', 'frames'), {'validated_dialed': frame})
+        local.set(('v1', 'keys'), {1: 'one'})
+        with mock.patch.object(Config, 'RESULT_SHARED_MAX_BYTES', 10):
+            local.set(('v1', 'large'), {'rows': list(range(100))})
+
+        self.assertFalse(any(key.startswith('test:result:') for key in self.redis.values))
+        self.assertIs(local.get(('v1', 'frames'))['validated_dialed'], frame)
+        self.assertIsNone(ResultCache(backend=backend).get(('v1', 'frames')))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,15 @@
 import unittest
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
+from unittest import mock
+from app import create_app
+from app.config import Config
+from app.adapters.cache import DataCache
+from app.adapters.result_cache import ResultCache, result_cache
 from app.services.metrics import MetricsCalculator
+from app.services.powerlist_index import PowerlistIndex
+from app.services.rollup import RunningAggregates
 
 class TestMetricsCalculator(unittest.TestCase):
     def setUp(self):
@@ -66,6 +74,39 @@ class TestMetricsCalculator(unittest.TestCase):
         expected_target = baseline_metrics['connect_rate'] * 1.3  # 30% uplift
         self.assertEqual(metrics['target_connect_rate'], expected_target)
     
+    def test_calculate_pilot_sweep(self):
+        """Test that the sweep grid matches the default pilot settings and scales with them."""
+        calc = MetricsCalculator(self.data)
+        sweep = calc.calculate_pilot_sweep([1, 4], [5, 10, 20], [1, 2])
+        
+        # Connect rate is the pilot target for every setting; answer share follows dial-at-a-time
+        baseline = calc.calculate_baseline_metrics()
+        target = calc.calculate_pilot_metrics(1, 5)['target_connect_rate']
+        self.assertEqual(sweep['connect_rate'][0][0][0], target)
+        self.assertEqual(sweep['connect_rate'][1][2][1], calc.calculate_pilot_metrics(4, 20)['target_connect_rate'])
+        self.assertEqual(sweep['answer_event_pct'][1][2][1], baseline['answer_event_pct'])
+        self.assertEqual(sweep['answer_event_pct'][0][0][0], 100.0)
+        
+        # Attempt counts are 5, 3 and 15: two contacts reach 5, one reaches 10, none 20
+        self.assertEqual(sweep['cooldown_load'][0][0], [0.4, 0.8])
+        self.assertEqual(sweep['cooldown_load'][1][1], [0.1, 0.2])
+        self.assertEqual(sweep['cooldown_load'][1][2], [0.0, 0.0])
+    
+    def test_pilot_connect_rate_is_bounded(self):
+        """Test that a high baseline never projects a connect rate above 100%."""
+        kixie = self.kixie_data.assign(Disposition=['Connected'] * 70 + ['No Answer'] * 30)
+        calc = MetricsCalculator(dict(self.data, kixie=kixie))
+        sweep = calc.calculate_pilot_sweep([1, 2, 3, 4], [5, 10], [1, 2])
+        
+        rates = np.array(sweep['connect_rate'])
+        self.assertTrue((rates <= 100).all())
+        self.assertEqual(calc.calculate_pilot_metrics()['target_connect_rate'], 91.0)
+        
+        kixie = self.kixie_data.assign(Disposition=['Connected'] * 90 + ['No Answer'] * 10)
+        calc = MetricsCalculator(dict(self.data, kixie=kixie))
+        self.assertEqual(calc.calculate_pilot_metrics()['target_connect_rate'], 100.0)
+        self.assertTrue((np.array(calc.calculate_pilot_sweep([1, 4], [5], [1])['connect_rate']) <= 100).all())
+    
     def test_calculate_weekly_trends(self):
         """Test weekly trends calculation."""
         calc = MetricsCalculator(self.data)
@@ -80,6 +121,56 @@ class TestMetricsCalculator(unittest.TestCase):
         self.assertGreater(len(trends['weeks']), 0)
         self.assertGreater(len(trends['total_calls']), 0)
     
+    def test_trends_granularity(self):
+        """Test day and month buckets and their disposition counts."""
+        calc = MetricsCalculator(self.data)
+        daily = calc.calculate_weekly_trends('day')
+        monthly = calc.calculate_weekly_trends('month')
+        
+        self.assertEqual(daily['weeks'], ['2024-01-01', '2024-01-02', '2024-01-03', '2024-01-04', '2024-01-05'])
+        self.assertEqual(daily['connected_calls'], [24, 24, 2, 0, 0])
+        self.assertEqual(daily['voicemail_calls'], [0, 18, 2, 0, 0])
+        self.assertEqual(daily['no_answer_calls'], [0, 0, 22, 24, 4])
+        self.assertEqual(monthly['weeks'], ['2024-01'])
+        self.assertEqual(monthly['total_calls'], [100])
+        self.assertEqual(calc.calculate_weekly_trends()['weeks'], ['2024-01-01/2024-01-07'])
+    
+    def test_trends_date_range(self):
+        """Test that only calls with start <= datetime < end are counted."""
+        calc = MetricsCalculator(self.data)
+        trends = calc.calculate_weekly_trends('day', pd.Timestamp('2024-01-02'), pd.Timestamp('2024-01-03'))
+        
+        self.assertEqual(trends['weeks'], ['2024-01-02'])
+        self.assertEqual(trends['total_calls'], [24])
+        with self.assertRaises(ValueError):
+            calc.calculate_weekly_trends('year')
+    
+    def test_baseline_date_range(self):
+        """Test that a date range gives the baseline of just the calls inside it."""
+        start, end = pd.Timestamp('2024-01-02 06:00'), pd.Timestamp('2024-01-03')
+        metrics = MetricsCalculator(self.data).calculate_baseline_metrics(start, end)
+        
+        inside = self.kixie_data[(self.kixie_data['datetime'] >= start) & (self.kixie_data['datetime'] < end)]
+        expected = MetricsCalculator(dict(self.data, kixie=inside)).calculate_baseline_metrics()
+        self.assertEqual(metrics, expected)
+        self.assertEqual(metrics['total_calls'], 18)
+    
+    def test_baseline_route_aware_bounds(self):
+        """Test that UTC bounds, midnight ones included, are read as local call times."""
+        data = dict(self.data, last_updated=None, **RunningAggregates.build(self.kixie_data, self.powerlist_data).frames())
+        app = create_app()
+        with mock.patch.object(Config, 'TIMEZONE', 'Asia/Manila'), \
+                mock.patch.object(DataCache, 'get_data', return_value=data), app.test_client() as client:
+            utc_midnight = client.get('/api/baseline?start=2024-01-02T00:00:00Z')
+            self.assertEqual(utc_midnight.status_code, 200)
+            expected = MetricsCalculator(data).calculate_baseline_metrics(pd.Timestamp('2024-01-02 08:00'))
+            self.assertEqual(utc_midnight.get_json(), expected)
+            
+            # 16:00 UTC is local midnight, answered from the cube like a bare date
+            local_midnight = client.get('/api/baseline?start=2024-01-01T16:00:00Z&end=2024-01-02T16:00:00Z').get_json()
+            self.assertEqual(local_midnight, client.get('/api/baseline?start=2024-01-02&end=2024-01-02').get_json())
+            self.assertEqual(local_midnight['total_calls'], 24)
+    
     def test_calculate_attempt_distribution(self):
         """Test attempt distribution calculation."""
         calc = MetricsCalculator(self.data)
@@ -105,6 +196,111 @@ class TestMetricsCalculator(unittest.TestCase):
         # One contact should be in cooldown (attempt count >= 10)
         self.assertEqual(cooldown['cooldown_contacts'], 1)
 
+class TestPowerlistIndex(unittest.TestCase):
+    def setUp(self):
+        self.powerlist = pd.DataFrame({
+            'List Name': pd.Categorical(['NAICS East', 'Other', None, 'naics west', 'Other', 'NAICS East']),
+            'Attempt Count': [5, 3, 7, 5, 12, 2]
+        })
+        self.index = PowerlistIndex.build(self.powerlist)
+
+    def test_matches_row_filter(self):
+        """Test that filtering the distinct names selects the same rows as filtering every row."""
+        for pattern in ['naics', 'NAICS E', 'er$', 'zzz']:
+            rows = self.powerlist['List Name'].str.contains(pattern, case=False, na=False)
+            mask = self.index.match(pattern)
+
+            self.assertEqual(self.index.size(mask), rows.sum())
+            expected = self.powerlist.loc[rows, 'Attempt Count'].value_counts().sort_index()
+            self.assertEqual(self.index.attempt_distribution(mask).to_dict(), expected.to_dict())
+
+    def test_names_and_stored_index(self):
+        """Test that names keep first-appearance order and that a stored index is reused."""
+        self.assertEqual(self.index.names.tolist()[:2], ['NAICS East', 'Other'])
+        self.assertEqual(len(self.index.names), 4)
+        self.assertEqual(self.index.size(self.index.match('')), 6)
+
+        data = {'powerlist': self.powerlist.iloc[:0], **self.index.frames()}
+        self.assertEqual(MetricsCalculator(data).powerlist_index.size(self.index.match('')), 6)
+
+class TestMemoizedMetrics(unittest.TestCase):
+    def setUp(self):
+        result_cache.clear()
+        self.addCleanup(result_cache.clear)
+        self.data = {
+            'kixie': pd.DataFrame({
+                'datetime': pd.date_range('2024-01-01', periods=4, freq='D'),
+                'phone_normalized': ['1234567890', '1234567890', '0987654321', '5555555555'],
+                'Disposition': ['Connected', 'No Answer', 'Left voicemail', 'Busy']
+            }),
+            'powerlist': pd.DataFrame({
+                'Attempt Count': [5, 3, 15],
+                'List Name': ['NAICS', 'NAICS', 'Other']
+            }),
+            'version': 'v1'
+        }
+
+    def test_repeated_calls_are_lookups(self):
+        """Test that a second call with the same data version and arguments is not recomputed."""
+        first = MetricsCalculator(self.data).calculate_attempt_distribution('NAICS')
+
+        with mock.patch.object(PowerlistIndex, 'attempt_distribution') as attempt_distribution:
+            second = MetricsCalculator(dict(self.data)).calculate_attempt_distribution(list_name='NAICS')
+            attempt_distribution.assert_not_called()
+
+        self.assertIs(second, first)
+        self.assertNotEqual(MetricsCalculator(self.data).calculate_attempt_distribution('Other'), first)
+
+    def test_key_includes_version_and_config(self):
+        """Test that a new data version or a changed Config value recomputes."""
+        calc = MetricsCalculator(self.data)
+        baseline = calc.calculate_baseline_metrics()
+
+        with mock.patch.object(Config, 'CONNECT_DISPOSITIONS', {'Connected'}):
+            self.assertEqual(MetricsCalculator(self.data).calculate_baseline_metrics()['connected_calls'], 1)
+
+        changed = dict(self.data, version='v2', kixie=self.data['kixie'].iloc[:2])
+        self.assertEqual(MetricsCalculator(changed).calculate_baseline_metrics()['total_calls'], 2)
+        self.assertEqual(calc.calculate_baseline_metrics(), baseline)
+
+    def test_unversioned_data_is_not_cached(self):
+        """Test that data without a version is always recomputed."""
+        del self.data['version']
+        MetricsCalculator(self.data).calculate_weekly_trends()
+
+        self.assertEqual(len(result_cache), 0)
+
+    def test_lru_eviction(self):
+        """Test that the least recently used result is evicted first."""
+        cache = ResultCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(len(cache), 2)
+
+    def test_byte_bound_eviction(self):
+        """Test that large frames are evicted by size long before the entry limit."""
+        frame = pd.DataFrame({'value': np.arange(1000, dtype='int64')})
+        cache = ResultCache(maxsize=100, max_bytes=20000)
+        cache.set('a', {'rows': frame})
+        cache.set('b', {'rows': frame})
+        cache.set('c', {'rows': frame})
+
+        self.assertIsNone(cache.get('a'))
+        self.assertIs(cache.get('c')['rows'], frame)
+        self.assertEqual(len(cache), 2)
+        self.assertLessEqual(cache.nbytes, 20000)
+
+        # A result bigger than the whole bound is not kept
+        cache.set('d', pd.DataFrame({'value': np.arange(5000, dtype='int64')}))
+        self.assertIsNone(cache.get('d'))
+        cache.clear()
+        self.assertEqual(cache.nbytes, 0)
+
 if __name__ == '__main__':
     unittest.main()
 
@@ -1,6 +1,13 @@
+import json
 import unittest
+from unittest import mock
+import numpy as np
 import pandas as pd
+from app import create_app
+from app.adapters.cache import DataCache
+from app.routes.validation import _decode_cursor, _encode_cursor
 from app.services.validation_merge import ValidationMerger
+from app.services.phone_index import PhoneIndex
 
 class TestValidationMerger(unittest.TestCase):
     def setUp(self):
@@ -57,6 +64,128 @@ class TestValidationMerger(unittest.TestCase):
         # Check carrier summary
         self.assertIsInstance(cross_ref['carrier_summary'], dict)
     
+    def test_cross_reference_counts_contacts(self):
+        """Test that each contact is counted once and joined to its latest call."""
+        self.data['telesign'] = self.telesign_data.assign(is_reachable=[True, False, True, True, True])
+        cross_ref = ValidationMerger(self.data).cross_reference_data()
+        
+        self.assertEqual(cross_ref['validated_dialed']['count'], 4)
+        self.assertEqual(cross_ref['validated_only']['count'], 0)
+        self.assertEqual(cross_ref['dialed_only']['count'], 1)
+        self.assertEqual(cross_ref['dialed_only']['data'][0]['Phone Number'], '2222222222')
+        
+        latest = cross_ref['validated_dialed']['data'][0]
+        self.assertEqual((latest['Phone Number'], latest['datetime']), ('1234567890', pd.Timestamp('2024-01-01 05:00')))
+        self.assertEqual(cross_ref['false_negatives']['count'], 1)
+        self.assertEqual(cross_ref['false_negatives']['data'][0]['Disposition'], 'Left voicemail')
+        
+        # Calls outside the window do not count as dialed
+        windowed = ValidationMerger(self.data).cross_reference_data(end=pd.Timestamp('2024-01-01 02:00'))
+        self.assertEqual(windowed['validated_dialed']['count'], 2)
+        self.assertEqual(windowed['validated_only']['count'], 2)
+    
+    def test_false_negative_from_later_record(self):
+        """Test that a number any Telesign record marks unreachable counts as a false negative."""
+        later = pd.DataFrame({'phone_normalized': ['0987654321'], 'is_reachable': [False], 'carrier': ['AT&T'], 'risk_level': ['High']})
+        self.data['telesign'] = pd.concat([self.telesign_data.assign(is_reachable=True), later], ignore_index=True)
+        cross_ref = ValidationMerger(self.data).cross_reference_data()
+        
+        self.assertEqual(cross_ref['false_negatives']['count'], 1)
+        negative = cross_ref['false_negatives']['data'][0]
+        self.assertEqual((negative['Phone Number'], negative['is_reachable']), ('0987654321', False))
+        # Other categories still show the first record
+        dialed = {row['Phone Number']: row for row in cross_ref['validated_dialed']['data']}
+        self.assertEqual(dialed['0987654321']['is_reachable'], True)
+    
+    def test_sorted_pages(self):
+        """Test category ordering and the per-category record limit."""
+        merger = ValidationMerger(self.data)
+        rows = merger.cross_reference_sorted('validated_dialed', 'Phone Number', ascending=False)
+        
+        self.assertEqual(rows['Phone Number'].tolist(), ['5555555555', '1234567890', '1111111111', '0987654321'])
+        page = merger.cross_reference_sorted('validated_dialed', 'Phone Number', ascending=False, offset=1, limit=2)
+        self.assertEqual(page['Phone Number'].tolist(), ['1234567890', '1111111111'])
+        
+        # Only the order is kept per sort, not a sorted copy of the rows
+        order = merger.cross_reference_order('validated_dialed', 'Phone Number', ascending=False)
+        self.assertEqual(order.dtype, np.int32)
+        frame = merger.cross_reference_frames()['validated_dialed']
+        self.assertEqual(frame['Phone Number'].values[order].tolist(), rows['Phone Number'].tolist())
+        limited = merger.cross_reference_data(limit=1)
+        self.assertEqual(limited['validated_dialed']['count'], 4)
+        self.assertEqual(len(limited['validated_dialed']['data']), 1)
+    
+    def test_crossref_api_cursor_and_ndjson(self):
+        """Test that cursors walk a category page by page and NDJSON streams every row."""
+        app = create_app()
+        data = dict(self.data, version='v1', last_updated=None)
+        with mock.patch.object(DataCache, 'get_data', return_value=data), app.test_client() as client:
+            page = client.get('/validation/api/crossref?category=validated_dialed&sort=Phone Number&limit=3').get_json()
+            self.assertEqual([row['Phone Number'] for row in page['data']], ['0987654321', '1111111111', '1234567890'])
+            
+            last = client.get('/validation/api/crossref?cursor=' + page['next_cursor']).get_json()
+            self.assertEqual([row['Phone Number'] for row in last['data']], ['5555555555'])
+            self.assertIsNone(last['next_cursor'])
+            
+            stream = client.get('/validation/api/crossref?format=ndjson')
+            lines = [json.loads(line) for line in stream.get_data(as_text=True).splitlines()]
+            self.assertEqual(len(lines), 5)
+            self.assertEqual(lines[-1]['category'], 'dialed_only')
+            
+            data['version'] = 'v2'
+            expired = client.get('/validation/api/crossref?cursor=' + page['next_cursor'])
+            self.assertEqual(expired.status_code, 400)
+    
+    def test_crossref_api_rejects_bad_paging(self):
+        """Test that tampered cursors and bad limits are client errors, not server errors."""
+        app = create_app()
+        data = dict(self.data, version='v1', last_updated=None)
+        with mock.patch.object(DataCache, 'get_data', return_value=data), app.test_client() as client:
+            page = client.get('/validation/api/crossref?category=validated_dialed&limit=1').get_json()
+            state = _decode_cursor(page['next_cursor'])
+            
+            for tampered in [{'start': 'garbage'}, {'end': 12}, {'offset': -1}, {'offset': '1'}, {'offset': True}, {'category': ['a']}]:
+                response = client.get('/validation/api/crossref?cursor=' + _encode_cursor(dict(state, **tampered)))
+                self.assertEqual(response.status_code, 400, tampered)
+            self.assertEqual(client.get('/validation/api/crossref?cursor=not-base64!').status_code, 400)
+            
+            for limit in ['abc', '0', '-3', '1.5']:
+                self.assertEqual(client.get(f'/validation/api/crossref?limit={limit}').status_code, 400, limit)
+            self.assertEqual(client.get('/validation/api/crossref?cursor=' + _encode_cursor(state)).status_code, 200)
+    
+    def test_carrier_outcomes(self):
+        """Test that each call counts once per carrier and risk level, even for numbers validated twice."""
+        telesign = pd.DataFrame({
+            'phone_normalized': ['1234567890', '0987654321', '5555555555', '1111111111', '1234567890'],
+            'is_reachable': [True, False, False, False, False],
+            'carrier': ['Verizon', 'AT&T', 'Verizon', 'AT&T', 'Sprint'],
+            'risk_level': ['Low', 'Low', 'High', 'High', 'High']
+        })
+        merger = ValidationMerger(dict(self.data, telesign=telesign))
+        outcomes = merger.calculate_carrier_outcomes()
+        
+        # The number dialed but never validated is left out; its duplicate Sprint record is never joined
+        self.assertEqual((outcomes['validated_calls'], outcomes['unvalidated_calls']), (8, 2))
+        self.assertEqual(sorted(outcomes['carrier']), ['AT&T', 'Verizon'])
+        self.assertEqual(outcomes['carrier']['AT&T']['voicemail_rate'], 50.0)
+        self.assertEqual(outcomes['carrier']['AT&T']['false_negative_rate'], 50.0)
+        self.assertEqual(outcomes['carrier']['Verizon']['connect_rate'], 50.0)
+        self.assertEqual(outcomes['carrier']['Verizon']['false_negatives'], 2)
+        self.assertEqual(outcomes['risk_level']['Low']['connect_rate'], 100.0)
+        self.assertEqual(outcomes['risk_level']['High']['calls'], 4)
+        
+        # The later record marks 1234567890 unreachable, so its connects become false negatives
+        self.assertEqual(outcomes['carrier']['Verizon']['unreachable_calls'], 4)
+        self.assertEqual(outcomes['carrier']['Verizon']['false_negative_rate'], 50.0)
+        
+        later = merger.calculate_carrier_outcomes(pd.Timestamp('2024-01-01 05:00'), None)
+        self.assertEqual(later['validated_calls'], 4)
+        
+        app = create_app()
+        with mock.patch.object(DataCache, 'get_data', return_value=dict(self.data, telesign=telesign)), app.test_client() as client:
+            self.assertEqual(client.get('/validation/api/carriers').get_json()['carrier'], outcomes['carrier'])
+            self.assertEqual(client.get('/validation/api/carriers?start=soon').status_code, 400)
+        
     def test_calculate_data_hygiene_metrics(self):
         """Test data hygiene metrics calculation."""
         merger = ValidationMerger(self.data)
@@ -114,6 +243,38 @@ class TestValidationMerger(unittest.TestCase):
         self.assertEqual(cross_ref['validated_dialed']['count'], 0)
         self.assertEqual(hygiene.get('total_validated', 0), 0)
 
+class TestPhoneIndex(unittest.TestCase):
+    def setUp(self):
+        self.calls = pd.DataFrame({'phone_key': [15, 12, -1, 15, 30, 12, 15]})
+        self.validated = pd.DataFrame({'phone_key': [12, 15, 15, 40, -1]})
+        self.index = PhoneIndex.build({'kixie': self.calls['phone_key'].values, 'telesign': self.validated['phone_key'].values})
+
+    def test_keys_counts_and_positions(self):
+        """Test sorted unique keys with their row counts and first/last rows, missing keys left out."""
+        calls = self.index['kixie']
+        
+        self.assertEqual(calls.keys.tolist(), [12, 15, 30])
+        self.assertEqual(calls.rows.tolist(), [2, 3, 1])
+        self.assertEqual(calls.first.tolist(), [1, 0, 4])
+        self.assertEqual(calls.last.tolist(), [5, 6, 4])
+        self.assertEqual(len(self.index['powerlist']), 0)
+        
+        found, positions = calls.lookup([30, 99, -1, 12])
+        self.assertEqual(found.tolist(), [True, False, False, True])
+        self.assertEqual(positions[found].tolist(), [2, 0])
+
+    def test_overlap_counts_match_merge(self):
+        """Test that joined rows equal an inner merge and distinct overlaps are counted."""
+        known = self.calls[self.calls['phone_key'] >= 0]
+        merged = pd.merge(self.validated[self.validated['phone_key'] >= 0], known, on='phone_key')
+        
+        self.assertEqual(self.index['telesign'].joined_rows(self.index['kixie']), len(merged))
+        self.assertEqual(self.index['telesign'].shared_count(self.index['kixie']), 2)
+        self.assertEqual(self.index['telesign'].missing_count(self.index['kixie']), 1)
+        
+        stored = PhoneIndex.from_data(self.index.frames())
+        self.assertEqual(stored['kixie'].keys.tolist(), [12, 15, 30])
+
 if __name__ == '__main__':
     unittest.main()
 